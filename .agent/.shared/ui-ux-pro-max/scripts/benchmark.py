@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Benchmark - timings for the search stack, emitted as JSON
+Usage: python benchmark.py [--scales 1,10,100] [--queries 200] [--engines python,numpy]
+                           [--backends csv,sqlite] [--output results.json]
+
+Per scale: index build (cold and from the disk cache), cold and warm query latency per engine and
+backend, batched search_many throughput, domain routing and full design-system generation.
+Scale 1 is the real data; scale N is a synthetic corpus with N variants of every CSV row
+(words shuffled, one word misspelt), so the vocabulary grows as well as the row count.
+Scale 1000 works but builds over a million rows per engine; expect minutes and several GB.
+"""
+
+import argparse
+import csv
+import json
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import core
+import design_system
+
+# ============ CONFIGURATION ============
+SCALES = [1, 10, 100]
+QUERY_COUNT = 200
+SEED = 42
+DESIGN_SYSTEM_QUERIES = ["fintech dashboard", "beauty spa wellness", "kids education game", "saas landing page", "luxury e-commerce"]
+
+
+# ============ HELPERS ============
+def _timed(fn, *args, **kwargs):
+    """(seconds, result) of one call"""
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def _latency(samples):
+    """Summary of a list of durations in seconds, reported in milliseconds"""
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4)
+    }
+
+
+def _reset_memory():
+    """Drop every in-process index so the next query is cold (the disk caches stay)"""
+    core._index_cache.clear()
+    core._cache_keys.clear()
+    core._sparse_indexes.clear()
+    core._unified_index = None
+    for conn in core._db_local.__dict__.pop("connections", {}).values():
+        conn.close()
+
+
+@contextmanager
+def _data_dir(data_dir, cache_dir):
+    """Point core and design_system at another data and cache directory for the duration"""
+    saved = (core.DATA_DIR, core.CACHE_DIR, core.DB_PATH, design_system.DATA_DIR)
+    core.DATA_DIR = design_system.DATA_DIR = data_dir
+    core.CACHE_DIR = cache_dir
+    core.DB_PATH = cache_dir / "knowledge.sqlite3"
+    _reset_memory()
+    try:
+        yield
+    finally:
+        _reset_memory()
+        core.DATA_DIR, core.CACHE_DIR, core.DB_PATH, design_system.DATA_DIR = saved
+
+
+def _misspell(word, rng):
+    """Drop or duplicate one inner character"""
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:] if rng.random() < 0.5 else word[:i] + word[i] + word[i:]
+
+
+# ============ CORPORA ============
+def synthesize(scale, target):
+    """Write the real CSVs scaled to `scale` variants per row under target; returns the row count"""
+    rng = random.Random(SEED)
+    rows_written = 0
+    for source, file, search_cols, _ in core._index_sources():
+        with open(core.DATA_DIR / file, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            columns = reader.fieldnames
+            data = list(reader)
+
+        out_file = target / file
+        out_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(out_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+            writer.writeheader()
+            for variant in range(scale):
+                for row in data:
+                    if variant:
+                        row = dict(row)
+                        for col in search_cols:
+                            words = str(row.get(col) or "").split()
+                            rng.shuffle(words)
+                            long_words = [i for i, word in enumerate(words) if len(word) > 3]
+                            if long_words:
+                                i = rng.choice(long_words)
+                                words[i] = _misspell(words[i], rng)
+                            row[col] = " ".join(words)
+                    writer.writerow(row)
+            rows_written += len(data) * scale
+
+    reasoning = core.DATA_DIR / design_system.REASONING_FILE
+    if reasoning.exists():
+        shutil.copy(reasoning, target / design_system.REASONING_FILE)
+    return rows_written
+
+
+def sample_queries(count):
+    """Deterministic (query, domain or None, stack or None) triples built from words of the real data,
+    two thirds domain searches and one third stack searches; some words carry a typo"""
+    rng = random.Random(SEED)
+    words = {}
+    for source, file, search_cols, _ in core._index_sources():
+        rows = core._load_csv(core.DATA_DIR / file)
+        words[source] = sorted({w for row in rows for col in search_cols for w in core.BM25().tokenize(row.get(col) or "")})
+
+    domains = [source for source in words if source in core.CSV_CONFIG and words[source]]
+    stacks = [source for source in words if source.startswith("stack:") and words[source]]
+    queries = []
+    for i in range(count):
+        source = rng.choice(stacks if i % 3 == 2 and stacks else domains)
+        terms = rng.sample(words[source], min(len(words[source]), rng.randint(1, 3)))
+        if rng.random() < 0.2:
+            terms[0] = _misspell(terms[0], rng) if len(terms[0]) > 3 else terms[0]
+        if source.startswith("stack:"):
+            queries.append((" ".join(terms), None, source.split(":", 1)[1]))
+        else:
+            queries.append((" ".join(terms), source, None))
+    return queries
+
+
+# ============ MEASUREMENTS ============
+def _run_query(query, domain, stack, engine, backend):
+    if stack:
+        return core.search_stack(query, stack, core.MAX_RESULTS, engine, backend)
+    return core.search(query, domain, core.MAX_RESULTS, engine, backend)
+
+
+def bench_index_build():
+    """Fit every domain/stack index from CSV (empty caches), then reload it from the disk cache"""
+    shutil.rmtree(core.CACHE_DIR, ignore_errors=True)
+    _reset_memory()
+    build, _ = _timed(lambda: [core._load_index(core.DATA_DIR / file, cols) for _, file, cols, _ in core._index_sources()])
+    _reset_memory()
+    reload, _ = _timed(lambda: [core._load_index(core.DATA_DIR / file, cols) for _, file, cols, _ in core._index_sources()])
+    unified, _ = _timed(core._load_unified_index)
+    return {"build_s": round(build, 4), "load_from_disk_s": round(reload, 4), "unified_build_s": round(unified, 4)}
+
+
+def bench_queries(queries, engine, backend):
+    """Cold latency (first query per source after dropping in-process indexes) and warm latency over all queries"""
+    _reset_memory()
+    cold = []
+    seen = set()
+    for query, domain, stack in queries:
+        if (domain, stack) not in seen:
+            seen.add((domain, stack))
+            cold.append(_timed(_run_query, query, domain, stack, engine, backend)[0])
+
+    warm = [_timed(_run_query, query, domain, stack, engine, backend)[0] for query, domain, stack in queries]
+    hits = sum(1 for query, domain, stack in queries if _run_query(query, domain, stack, engine, backend).get("count"))
+    return {"cold": _latency(cold), "warm": _latency(warm), "queries_with_results": hits}
+
+
+def bench_batch(queries, engine, backend):
+    """Warm search_many over every domain query at once"""
+    requests = [(query, domain, core.MAX_RESULTS) for query, domain, stack in queries if domain]
+    core.search_many(requests, engine, backend)
+    seconds, _ = _timed(core.search_many, requests, engine, backend)
+    return {"requests": len(requests), "total_s": round(seconds, 4), "per_query_ms": round(seconds / max(1, len(requests)) * 1000, 4)}
+
+
+def bench_routing(queries, engine, backend):
+    """Warm domain auto-detection latency"""
+    core.detect_domain(queries[0][0], engine, backend)
+    return _latency([_timed(core.detect_domain, query, engine, backend)[0] for query, _, _ in queries])
+
+
+def bench_design_system(backend):
+    """Full design-system generation: the first call after dropping in-process indexes, then warm calls"""
+    saved = core.SEARCH_BACKEND
+    core.SEARCH_BACKEND = backend
+    try:
+        _reset_memory()
+        cold, _ = _timed(design_system.generate_design_system, DESIGN_SYSTEM_QUERIES[0])
+        warm = [_timed(design_system.generate_design_system, query)[0] for query in DESIGN_SYSTEM_QUERIES]
+    finally:
+        core.SEARCH_BACKEND = saved
+    return {"cold_s": round(cold, 4), "warm": _latency(warm)}
+
+
+def bench_scale(queries, engines, backends):
+    """All measurements against the data directory currently configured in core"""
+    result = {"index": bench_index_build(), "engines": {}, "backends": {}, "design_system": {}}
+
+    for engine in engines:
+        result["engines"][engine] = {
+            "queries": bench_queries(queries, engine, "csv"),
+            "batch": bench_batch(queries, engine, "csv"),
+            "routing": bench_routing(queries, engine, "csv")
+        }
+
+    for backend in backends:
+        if backend == "sqlite":
+            build, _ = _timed(core.build_database)
+            result["backends"]["sqlite"] = {
+                "build_s": round(build, 4),
+                "db_bytes": core.DB_PATH.stat().st_size,
+                "queries": bench_queries(queries, None, "sqlite"),
+                "routing": bench_routing(queries, None, "sqlite")
+            }
+        result["design_system"][backend] = bench_design_system(backend)
+    return result
+
+
+def run(scales=SCALES, query_count=QUERY_COUNT, engines=None, backends=None):
+    """Benchmark every scale; returns the JSON-ready report"""
+    engines = [e for e in (engines or core.ENGINES) if e != "numpy" or core._load_numpy() is not None]
+    backends = backends or core.BACKENDS
+    queries = sample_queries(query_count)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": getattr(core._load_numpy(), "__version__", None),
+        "config": {"scales": scales, "queries": len(queries), "engines": engines, "backends": backends, "seed": SEED},
+        "scales": []
+    }
+
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix=f"uipro-bench-{scale}x-") as tmp:
+            data_dir, cache_dir = Path(tmp) / "data", Path(tmp) / ".cache"
+            if scale == 1:
+                shutil.copytree(core.DATA_DIR, data_dir)
+                rows = sum(len(core._load_csv(data_dir / file)) for _, file, _, _ in core._index_sources())
+            else:
+                rows = synthesize(scale, data_dir)
+            with _data_dir(data_dir, cache_dir):
+                started = time.perf_counter()
+                result = bench_scale(queries, engines, backends)
+            print(f"scale {scale}x: {rows} rows in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        report["scales"].append({"scale": scale, "rows": rows, **result})
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max search benchmark")
+    parser.add_argument("--scales", default=",".join(map(str, SCALES)), help=f"Comma-separated corpus scales (default: {','.join(map(str, SCALES))})")
+    parser.add_argument("--queries", "-q", type=int, default=QUERY_COUNT, help=f"Sampled queries per run (default: {QUERY_COUNT})")
+    parser.add_argument("--engines", default=",".join(core.ENGINES), help="Comma-separated scoring engines (numpy is skipped when not installed)")
+    parser.add_argument("--backends", default=",".join(core.BACKENDS), help="Comma-separated storage backends")
+    parser.add_argument("--output", "-o", type=str, default=None, help="Write the JSON report here instead of stdout")
+
+    args = parser.parse_args()
+    report = run(
+        [int(s) for s in args.scales.split(",")],
+        args.queries,
+        [e for e in args.engines.split(",") if e in core.ENGINES],
+        [b for b in args.backends.split(",") if b in core.BACKENDS]
+    )
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
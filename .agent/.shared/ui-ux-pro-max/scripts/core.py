@@ -5,14 +5,46 @@ UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
 import csv
+import hashlib
+import heapq
+import hmac
+import json
+import os
+import pickle
 import re
+import secrets
+import sqlite3
+import threading
+import weakref
 from pathlib import Path
 from math import log
+from bisect import bisect_right
 from collections import defaultdict
+from functools import lru_cache
+
+np = None  # NumPy, imported on first use by the "numpy" search engine (optional dependency)
 
 # ============ CONFIGURATION ============
 DATA_DIR = Path(__file__).parent.parent / "data"
+CACHE_DIR = DATA_DIR.parent / ".cache"  # Fitted BM25 indexes, rebuilt when a CSV changes
+INDEX_CACHE_VERSION = 6  # Bump when BM25 internals change so stale pickles are ignored
 MAX_RESULTS = 3
+ROUTING_CANDIDATES = 50  # Unified-index matches considered when routing a query to a domain
+
+# Typo tolerance: a query term missing from the index is replaced by up to TYPO_EXPANSIONS
+# vocabulary terms whose trigram similarity (Dice) is at least TYPO_MIN_SIMILARITY
+TYPO_MIN_SIMILARITY = 0.6
+TYPO_EXPANSIONS = 2
+TYPO_CACHE_SIZE = 4096  # Expansions remembered across all indexes (bounded for the long-running daemon)
+
+# Scoring engine: "python" (inverted index) or "numpy" (sparse matrix, batched); same rankings
+ENGINES = ["python", "numpy"]
+SEARCH_ENGINE = os.environ.get("UIPRO_SEARCH_ENGINE", "python")
+
+# Storage backend: "csv" (parsed CSVs + BM25 indexes above) or "sqlite" (FTS5 database built from the CSVs)
+BACKENDS = ["csv", "sqlite"]
+SEARCH_BACKEND = os.environ.get("UIPRO_SEARCH_BACKEND", "csv")
+DB_PATH = Path(os.environ.get("UIPRO_DB_PATH", CACHE_DIR / "knowledge.sqlite3"))
 
 CSV_CONFIG = {
     "style": {
@@ -98,16 +130,18 @@ AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
 # ============ BM25 IMPLEMENTATION ============
 class BM25:
-    """BM25 ranking algorithm for text search"""
+    """BM25 ranking algorithm for text search, scored through an inverted index"""
 
     def __init__(self, k1=1.5, b=0.75):
         self.k1 = k1
         self.b = b
-        self.corpus = []
         self.doc_lengths = []
         self.avgdl = 0
         self.idf = {}
         self.doc_freqs = defaultdict(int)
+        self.postings = {}  # term -> [(doc id, BM25 weight of the term in that doc)]
+        self.trigrams = {}  # trigram -> [vocabulary terms containing it]
+        self.trigram_counts = {}  # term -> number of distinct trigrams
         self.N = 0
 
     def tokenize(self, text):
@@ -115,48 +149,187 @@ class BM25:
         text = re.sub(r'[^\w\s]', ' ', str(text).lower())
         return [w for w in text.split() if len(w) > 2]
 
+    @staticmethod
+    def term_trigrams(term):
+        """Distinct character trigrams of a term padded with one space each side"""
+        padded = f" {term} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def expand(self, term):
+        """Nearest vocabulary terms for a term not in the index, as (term, similarity) pairs (LRU-cached)"""
+        return _expand_term(self, term)
+
+    def query_terms(self, query):
+        """(term, weight) pairs to score: indexed tokens with weight 1,
+        unknown tokens replaced by their nearest vocabulary terms weighted by similarity"""
+        terms = []
+        for token in self.tokenize(query):
+            if token in self.postings:
+                terms.append((token, 1.0))
+            else:
+                terms.extend(self.expand(token))
+        return terms
+
     def fit(self, documents):
         """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
-        self.N = len(self.corpus)
+        corpus = [self.tokenize(doc) for doc in documents]
+        self.N = len(corpus)
         if self.N == 0:
             return
-        self.doc_lengths = [len(doc) for doc in self.corpus]
+        self.doc_lengths = [len(doc) for doc in corpus]
         self.avgdl = sum(self.doc_lengths) / self.N
 
-        for doc in self.corpus:
-            seen = set()
+        term_freqs = []
+        for doc in corpus:
+            freqs = defaultdict(int)
             for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
+                freqs[word] += 1
+            term_freqs.append(freqs)
+            for word in freqs:
+                self.doc_freqs[word] += 1
 
         for word, freq in self.doc_freqs.items():
             self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
 
-    def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
-
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
-
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
-
-            scores.append((idx, score))
-
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+        # Term weights depend only on the document, so they are computed once here
+        postings = defaultdict(list)
+        for idx, freqs in enumerate(term_freqs):
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[idx] / self.avgdl)
+            for word, tf in freqs.items():
+                postings[word].append((idx, self.idf[word] * (tf * (self.k1 + 1)) / (tf + norm)))
+        self.postings = dict(postings)
+
+        trigrams = defaultdict(list)
+        for word in self.postings:
+            grams = self.term_trigrams(word)
+            self.trigram_counts[word] = len(grams)
+            for gram in grams:
+                trigrams[gram].append(word)
+        self.trigrams = dict(trigrams)
+
+    def score(self, query, top_k=None):
+        """Score documents against query, visiting only the postings of query terms.
+        With top_k, return just the best top_k matching documents; otherwise rank all documents."""
+        scores = defaultdict(float)
+        for term, factor in self.query_terms(query):
+            for idx, weight in self.postings[term]:
+                scores[idx] += weight * factor
+
+        # Ties keep document order
+        if top_k is not None:
+            return heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return sorted(((idx, scores.get(idx, 0)) for idx in range(self.N)), key=lambda x: x[1], reverse=True)
+
+
+@lru_cache(maxsize=TYPO_CACHE_SIZE)
+def _expand_term(bm25, term):
+    """BM25.expand: candidates come from the trigram index, so only terms sharing a trigram are compared"""
+    grams = bm25.term_trigrams(term)
+    shared = defaultdict(int)
+    for gram in grams:
+        for candidate in bm25.trigrams.get(gram, ()):
+            shared[candidate] += 1
+    similar = ((candidate, 2 * count / (len(grams) + bm25.trigram_counts[candidate])) for candidate, count in shared.items())
+    return tuple(heapq.nlargest(
+        TYPO_EXPANSIONS,
+        ((candidate, similarity) for candidate, similarity in similar if similarity >= TYPO_MIN_SIMILARITY),
+        key=lambda item: (item[1], item[0])
+    ))
+
+
+class SparseBM25:
+    """BM25 postings of a fitted index as a CSR term x document weight matrix (NumPy).
+    A batch of queries becomes a sparse query x term matrix and is scored in one product."""
+
+    def __init__(self, bm25):
+        self._bm25 = weakref.ref(bm25)  # Weak: the matrix is cached per BM25 and must not keep it alive
+        self.N = bm25.N
+        self.vocabulary = {term: col for col, term in enumerate(bm25.postings)}
+
+        lengths = np.fromiter((len(p) for p in bm25.postings.values()), dtype=np.int64, count=len(bm25.postings))
+        self.indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.indptr[1:])
+        total = int(self.indptr[-1])
+        self.indices = np.fromiter((idx for p in bm25.postings.values() for idx, _ in p), dtype=np.int64, count=total)
+        self.data = np.fromiter((weight for p in bm25.postings.values() for _, weight in p), dtype=np.float64, count=total)
+
+    def _query_matrix(self, queries):
+        """CSR query x term matrix of BM25.query_terms weights. A repeated query term gets one entry
+        per occurrence, so its weight is added as many times as in BM25.score."""
+        bm25 = self._bm25()
+        indptr = [0]
+        terms = []
+        factors = []
+        for query in queries:
+            for term, factor in bm25.query_terms(query):
+                terms.append(self.vocabulary[term])
+                factors.append(factor)
+            indptr.append(len(terms))
+        return np.array(indptr, dtype=np.int64), np.array(terms, dtype=np.int64), np.array(factors, dtype=np.float64)
+
+    def score_batch(self, queries, top_k):
+        """Top-k (doc id, score) lists for each query, ties in document order as in BM25.score"""
+        q_indptr, q_terms, q_factors = self._query_matrix(queries)
+        k = min(top_k, self.N)
+        if k <= 0:
+            return [[] for _ in queries]
+
+        # Sparse product of the query and weight matrices: expand each query term into its postings,
+        # then sum the entries of each (query, doc) pair. np.add.at adds them in query-term order,
+        # so the sums (and their ties) are the same floats BM25.score produces
+        starts = self.indptr[q_terms]
+        lengths = self.indptr[q_terms + 1] - starts
+        rows = np.repeat(np.repeat(np.arange(len(queries)), np.diff(q_indptr)), lengths)
+        positions = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(int(lengths.sum()))
+        pairs, inverse = np.unique(rows * self.N + self.indices[positions], return_inverse=True)
+        sums = np.zeros(len(pairs))
+        np.add.at(sums, inverse, self.data[positions] * np.repeat(q_factors, lengths))
+
+        # Pairs are sorted by (query, doc): each query's scored docs are one ascending run
+        bounds = np.searchsorted(pairs, np.arange(len(queries) + 1) * self.N)
+        results = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            scores = sums[start:end]
+            docs = pairs[start:end] % self.N
+            positive = scores > 0
+            scores, docs = scores[positive], docs[positive]
+            if len(scores) > k:
+                # Candidates: the k best by argpartition, widened to everything tied with the k-th score
+                kth = scores[np.argpartition(-scores, k - 1)[:k]].min()
+                candidates = scores >= kth
+                scores, docs = scores[candidates], docs[candidates]
+            order = np.lexsort((docs, -scores))[:k]
+            results.append([(int(docs[i]), float(scores[i])) for i in order])
+        return results
+
+
+def _load_numpy():
+    """Import NumPy on first use so plain searches (and the search.py client) start fast"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            np = False
+        else:
+            np = numpy
+    return np or None
+
+
+# SparseBM25 built per fitted BM25; dropped with the BM25 when a rebuilt index replaces it
+_sparse_indexes = weakref.WeakKeyDictionary()
+
+
+def _rank(bm25, queries, top_k, engine=None):
+    """Top-k (doc id, score) lists for a batch of queries with the selected engine.
+    The NumPy engine falls back to the pure-Python one when NumPy is not installed."""
+    engine = engine or SEARCH_ENGINE
+    if engine == "numpy" and _load_numpy() is not None and bm25.N:
+        sparse = _sparse_indexes.get(bm25)
+        if sparse is None:
+            sparse = _sparse_indexes[bm25] = SparseBM25(bm25)
+        return sparse.score_batch(queries, top_k)
+    return [bm25.score(query, top_k=top_k) for query in queries]
 
 
 # ============ SEARCH FUNCTIONS ============
@@ -166,22 +339,148 @@ def _load_csv(filepath):
         return list(csv.DictReader(f))
 
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
+# Compiled indexes by (file, variant), valid while the file signature matches
+_index_cache = {}
+
+
+def _file_hash(filepath):
+    """SHA-256 of a file's content"""
+    return hashlib.sha256(filepath.read_bytes()).hexdigest()
+
+
+# Cache files are "UIPRO-INDEX\n" + HMAC-SHA256 of the pickle + the pickle. The key lives in
+# CACHE_DIR/cache.key (0600, owned by the current user), so a pickle planted in .cache by anyone
+# who cannot read the key is rejected before it is unpickled.
+CACHE_MAGIC = b"UIPRO-INDEX\n"
+_cache_keys = {}
+
+
+def _cache_signing_key():
+    """This install's cache signing key, created on first use; None if it is unusable (no disk cache then)"""
+    key_file = CACHE_DIR / "cache.key"
+    if key_file in _cache_keys:
+        return _cache_keys[key_file]
+    key = None
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        try:
+            fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(secrets.token_bytes(32))
+        except FileExistsError:
+            pass
+        stat = os.stat(key_file)
+        private = not hasattr(os, "getuid") or (stat.st_uid == os.getuid() and not stat.st_mode & 0o077)
+        if private:
+            key = key_file.read_bytes()
+            key = key if len(key) == 32 else None
+    except OSError:
+        pass
+    _cache_keys[key_file] = key
+    return key
+
+
+def _read_cached_index(cache_file, key):
+    """Load a signed, pickled index entry, or None if missing, unsigned, tampered with or from another version"""
+    signing_key = _cache_signing_key()
+    if signing_key is None:
+        return None
+    try:
+        with open(cache_file, 'rb') as f:
+            blob = f.read()
+    except OSError:
+        return None
+    digest_end = len(CACHE_MAGIC) + hashlib.sha256().digest_size
+    if not blob.startswith(CACHE_MAGIC) or len(blob) < digest_end:
+        return None
+    payload = blob[digest_end:]
+    if not hmac.compare_digest(blob[len(CACHE_MAGIC):digest_end], hmac.digest(signing_key, payload, "sha256")):
+        return None
+    try:
+        entry = pickle.loads(payload)
+    except Exception:
+        return None
+    if not isinstance(entry, dict) or entry.get("version") != INDEX_CACHE_VERSION or entry.get("key") != key:
+        return None
+    return entry
+
+
+def _write_cached_index(cache_file, entry):
+    """Sign and pickle an index entry atomically; a read-only install just skips the disk cache"""
+    signing_key = _cache_signing_key()
+    if signing_key is None:
+        return
+    try:
+        payload = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, 'wb') as f:
+            f.write(CACHE_MAGIC + hmac.digest(signing_key, payload, "sha256") + payload)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+
+def _index_key(filepath, variant):
+    return (str(filepath.relative_to(DATA_DIR) if filepath.is_relative_to(DATA_DIR) else filepath), variant)
+
+
+def load_compiled(filepath, variant, build):
+    """Return (rows, build(rows)) for a CSV, reusing the in-memory or on-disk result while the file is unchanged.
+    variant names the build (e.g. the BM25 search columns); its result is pickled into the disk cache.
+    A changed mtime/size alone does not force a rebuild if the content hash still matches."""
+    key = _index_key(filepath, variant)
+    stat = filepath.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    entry = _index_cache.get(key)
+    if entry is not None and entry["signature"] == signature:
+        return entry["data"], entry["index"]
+
+    cache_file = CACHE_DIR / f"{filepath.stem}-{hashlib.sha1(repr(key).encode()).hexdigest()[:12]}.pickle"
+    if entry is None:
+        entry = _read_cached_index(cache_file, key)
+
+    if entry is None or entry["signature"] != signature:
+        content_hash = _file_hash(filepath)
+        if entry is not None and entry["hash"] == content_hash:
+            # Touched but not modified (checkout, copy): keep the index, remember the new signature
+            entry["signature"] = signature
+        else:
+            data = _load_csv(filepath)
+            entry = {"version": INDEX_CACHE_VERSION, "key": key, "signature": signature, "hash": content_hash, "data": data, "index": build(data)}
+        _write_cached_index(cache_file, entry)
+
+    _index_cache[key] = entry
+    return entry["data"], entry["index"]
+
+
+def _fit_bm25(data, search_cols):
+    """BM25 fitted on documents built from the search columns"""
+    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+    bm25 = BM25()
+    bm25.fit(documents)
+    return bm25
+
+
+def _load_index(filepath, search_cols):
+    """Return (rows, fitted BM25) for a CSV, cached per file and search columns"""
+    return load_compiled(filepath, tuple(search_cols), lambda data: _fit_bm25(data, search_cols))
+
+
+def _search_csv(filepath, search_cols, output_cols, query, max_results, engine=None):
     """Core search function using BM25"""
     if not filepath.exists():
         return []
 
-    data = _load_csv(filepath)
-
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+    data, bm25 = _load_index(filepath, search_cols)
 
     # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
+    ranked = _rank(bm25, [query], max_results, engine)[0]
+    return _result_rows(data, ranked, output_cols, max_results)
+
 
-    # Get top results with score > 0
+def _result_rows(data, ranked, output_cols, max_results):
+    """Output columns of the top results with score > 0"""
     results = []
     for idx, score in ranked[:max_results]:
         if score > 0:
@@ -191,33 +490,290 @@ def _search_csv(filepath, search_cols, output_cols, query, max_results):
     return results
 
 
-def detect_domain(query):
-    """Auto-detect the most relevant domain from query"""
-    query_lower = query.lower()
+# ============ UNIFIED INDEX ============
+def _index_sources():
+    """(source, file, search cols, output cols) of every domain and stack CSV; stack sources are named stack:<name>"""
+    sources = [(domain, config["file"], config["search_cols"], config["output_cols"]) for domain, config in CSV_CONFIG.items()]
+    sources += [(f"stack:{stack}", config["file"], _STACK_COLS["search_cols"], _STACK_COLS["output_cols"])
+                for stack, config in STACK_CONFIG.items()]
+    return [source for source in sources if (DATA_DIR / source[1]).exists()]
+
+
+# Unified index entry, valid while every source file keeps its content hash
+_unified_index = None
+
+
+def _load_unified_index():
+    """Return (sources, fitted BM25) for one index over all domain and stack files.
+    Each source is a dict with its name, file, output columns, rows and first doc id;
+    doc ids are contiguous per source, in _index_sources() order."""
+    global _unified_index
+    sources = []
+    start = 0
+    for name, file, search_cols, output_cols in _index_sources():
+        data, _ = _load_index(DATA_DIR / file, search_cols)
+        sources.append({"source": name, "file": file, "search_cols": search_cols, "output_cols": output_cols, "data": data, "start": start})
+        start += len(data)
+    key = tuple((source["source"], _index_cache[_index_key(DATA_DIR / source["file"], tuple(source["search_cols"]))]["hash"]) for source in sources)
+
+    if _unified_index is None or _unified_index["key"] != key:
+        cache_file = CACHE_DIR / "unified.pickle"
+        entry = _read_cached_index(cache_file, key)
+        if entry is None:
+            documents = [" ".join(str(row.get(col, "")) for col in source["search_cols"]) for source in sources for row in source["data"]]
+            bm25 = BM25()
+            bm25.fit(documents)
+            entry = {"version": INDEX_CACHE_VERSION, "key": key, "bm25": bm25}
+            _write_cached_index(cache_file, entry)
+        _unified_index = entry
+
+    return sources, _unified_index["bm25"]
+
+
+def _source_of(sources, idx):
+    """Source dict holding a unified doc id"""
+    return sources[bisect_right([source["start"] for source in sources], idx) - 1]
+
+
+def _route_scores(query, engine=None):
+    """Per-domain routing score from the unified index: total score of the domain's best MAX_RESULTS matches"""
+    sources, bm25 = _load_unified_index()
+    totals = defaultdict(float)
+    counts = defaultdict(int)
+    for idx, score in _rank(bm25, [query], ROUTING_CANDIDATES, engine)[0]:
+        domain = _source_of(sources, idx)["source"]
+        if domain in CSV_CONFIG and counts[domain] < MAX_RESULTS:
+            totals[domain] += score
+            counts[domain] += 1
+    return totals
+
+
+def search_all(query, max_results=MAX_RESULTS, engine=None, include_stacks=True, backend=None):
+    """Blended top results across all domains (and stacks) from the unified index, or the FTS5 tables
+    with the sqlite backend. Each result row carries its "Domain" (or "stack:<name>") ahead of the
+    source's output columns."""
+    if (backend or SEARCH_BACKEND) == "sqlite":
+        results = _search_all_sqlite(query, max_results, include_stacks)
+        return {"domain": "all", "query": query, "file": "all", "count": len(results), "results": results}
+
+    sources, bm25 = _load_unified_index()
+    results = []
+    for idx, score in _rank(bm25, [query], max_results if include_stacks else ROUTING_CANDIDATES, engine)[0]:
+        source = _source_of(sources, idx)
+        if score <= 0 or (not include_stacks and source["source"].startswith("stack:")):
+            continue
+        row = source["data"][idx - source["start"]]
+        results.append({"Domain": source["source"], **{col: row.get(col, "") for col in source["output_cols"] if col in row}})
+        if len(results) == max_results:
+            break
 
-    domain_keywords = {
-        "color": ["color", "palette", "hex", "#", "rgb"],
-        "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
-        "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
-        "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
-        "prompt": ["prompt", "css", "implementation", "variable", "checklist", "tailwind"],
-        "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora"],
-        "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
-        "typography": ["font", "typography", "heading", "serif", "sans"],
-        "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
-        "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
-        "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
+    return {
+        "domain": "all",
+        "query": query,
+        "file": "all",
+        "count": len(results),
+        "results": results
     }
 
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
-    best = max(scores, key=scores.get)
-    return best if scores[best] > 0 else "style"
+
+# ============ SQLITE FTS5 BACKEND ============
+# One FTS5 table per domain/stack source. Columns are stored as c0..cN (CSV headers are not valid
+# identifiers); only search columns are indexed. Each table is rebuilt when its CSV's mtime/size changes.
+_db_local = threading.local()
+
+
+def _table_name(source):
+    return "fts_" + re.sub(r"\W", "_", source)
+
+
+def _connect_database():
+    """Per-thread connection to the FTS5 database at DB_PATH"""
+    connections = _db_local.__dict__.setdefault("connections", {})
+    conn = connections.get(DB_PATH)
+    if conn is None:
+        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS sources (source TEXT PRIMARY KEY, file TEXT, signature TEXT, columns TEXT)")
+        connections[DB_PATH] = conn
+    return conn
+
+
+def _build_source(conn, source, file, search_cols, force=False):
+    """Create or refresh one source's FTS5 table; returns its column names.
+    A fresh table is checked with a plain read, so searches never take the write lock. A missing or
+    stale one is rebuilt in an immediate transaction, re-checked inside it, so concurrent processes
+    rebuild it only once."""
+    filepath = DATA_DIR / file
+    stat = filepath.stat()
+    signature = f"{stat.st_mtime_ns}:{stat.st_size}"
+    table = _table_name(source)
+
+    select = "SELECT signature, columns FROM sources WHERE source = ?"
+    row = conn.execute(select, (source,)).fetchone()
+    if row is not None and row[0] == signature and not force:
+        return json.loads(row[1])
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(select, (source,)).fetchone()
+        if row is not None and row[0] == signature and not force:
+            conn.execute("COMMIT")
+            return json.loads(row[1])
+
+        with open(filepath, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            columns = list(reader.fieldnames or [])
+            data = list(reader)
+
+        definitions = ", ".join(f"c{i}" + ("" if col in search_cols else " UNINDEXED") for i, col in enumerate(columns))
+        placeholders = ", ".join("?" * len(columns))
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute(f"CREATE VIRTUAL TABLE {table} USING fts5({definitions})")
+        conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", ([row.get(col) for col in columns] for row in data))
+        conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)", (source, file, signature, json.dumps(columns)))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return columns
+
+
+def build_database(force=True):
+    """Compile every domain and stack CSV into the FTS5 database at DB_PATH; returns the sources built"""
+    conn = _connect_database()
+    sources = _index_sources()
+    for source, file, search_cols, _ in sources:
+        _build_source(conn, source, file, search_cols, force)
+    return [source for source, _, _, _ in sources]
+
+
+def _fts_query(query):
+    """FTS5 MATCH expression: any of the query's BM25 tokens, each as a quoted string"""
+    return " OR ".join(f'"{token}"' for token in dict.fromkeys(BM25().tokenize(query)))
+
+
+def _sqlite_select(conn, source, file, search_cols, output_cols, score=False):
+    """(SELECT statement, output column names) ranking one source's FTS5 table by bm25(), search columns
+    weighted 1 and the rest 0. The table is freshness-checked (and rebuilt if stale) once per call.
+    Parameters: the MATCH expression and the row limit; with score=True the first column is -bm25()."""
+    columns = _build_source(conn, source, file, search_cols)
+    table = _table_name(source)
+    weights = ", ".join("1.0" if col in search_cols else "0.0" for col in columns)
+    selected = [columns.index(col) for col in output_cols if col in columns]
+    fields = [f"-bm25({table}, {weights})"] if score else []
+    fields += [f"c{i}" for i in selected] or ["rowid"]
+    sql = (f"SELECT {', '.join(fields)} FROM {table} WHERE {table} MATCH ? "
+           f"ORDER BY bm25({table}, {weights}), rowid LIMIT ?")
+    return sql, [columns[i] for i in selected]
+
+
+def _search_sqlite_many(source, file, search_cols, output_cols, queries):
+    """Top rows of one source for each (query, max_results) in queries, all over one connection and one
+    freshness check of its table. Unlike the csv backend, misspelled terms are not expanded."""
+    conn = _connect_database()
+    sql, names = _sqlite_select(conn, source, file, search_cols, output_cols)
+    results = []
+    for query, max_results in queries:
+        match = _fts_query(query)
+        rows = conn.execute(sql, (match, max_results)).fetchall() if match else []
+        results.append([dict(zip(names, row)) for row in rows])
+    return results
+
+
+def _search_sqlite(source, file, search_cols, output_cols, query, max_results):
+    """Top rows of one source ranked by FTS5 bm25()"""
+    return _search_sqlite_many(source, file, search_cols, output_cols, [(query, max_results)])[0]
+
+
+def _search_all_sqlite(query, max_results, include_stacks=True):
+    """Blended top rows across every FTS5 table, ordered by -bm25() (each table scores against its own
+    statistics, so the blend is approximate). Rows carry their "Domain" like search_all()'s."""
+    match = _fts_query(query)
+    if not match:
+        return []
+    conn = _connect_database()
+    scored = []
+    for source, file, search_cols, output_cols in _index_sources():
+        if not include_stacks and source.startswith("stack:"):
+            continue
+        sql, names = _sqlite_select(conn, source, file, search_cols, output_cols, score=True)
+        for score, *row in conn.execute(sql, (match, max_results)).fetchall():
+            scored.append((score, source, dict(zip(names, row))))
+    scored.sort(key=lambda item: -item[0])
+    return [{"Domain": source, **row} for _, source, row in scored[:max_results]]
+
+
+def _route_scores_sqlite(query):
+    """Per-domain routing score from the FTS5 tables: total -bm25() of the domain's best MAX_RESULTS matches"""
+    match = _fts_query(query)
+    if not match:
+        return {}
+    conn = _connect_database()
+    totals = {}
+    for source, file, search_cols, _ in _index_sources():
+        if source not in CSV_CONFIG:
+            continue
+        columns = _build_source(conn, source, file, search_cols)
+        table = _table_name(source)
+        weights = ", ".join("1.0" if col in search_cols else "0.0" for col in columns)
+        scores = conn.execute(f"SELECT -bm25({table}, {weights}) AS score FROM {table} WHERE {table} MATCH ? ORDER BY 1 DESC LIMIT ?",
+                              (match, MAX_RESULTS)).fetchall()
+        if scores:
+            totals[source] = sum(score for score, in scores)
+    return totals
+
+
+DOMAIN_KEYWORDS = {
+    "color": ["color", "palette", "hex", "#", "rgb"],
+    "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
+    "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
+    "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
+    "prompt": ["prompt", "css", "implementation", "variable", "checklist", "tailwind"],
+    "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora"],
+    "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
+    "typography": ["font", "typography", "heading", "serif", "sans"],
+    "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
+    "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
+    "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
+}
+
+def _keyword_pattern(keyword):
+    """Whole-word matcher, so "luxury" does not count as "ux" nor "photographer" as "graph".
+    Boundaries apply only at word characters: "#" still matches "#1e40af"."""
+    return re.compile(
+        (r"(?<!\w)" if re.match(r"\w", keyword) else "")
+        + re.escape(keyword)
+        + (r"(?!\w)" if re.search(r"\w$", keyword) else "")
+    )
+
+
+_DOMAIN_PATTERNS = {domain: [_keyword_pattern(kw) for kw in keywords] for domain, keywords in DOMAIN_KEYWORDS.items()}
+
+
+def detect_domain(query, engine=None, backend=None):
+    """Auto-detect the most relevant domain from query by the unified-index (or FTS5) routing scores,
+    each multiplied by (1 + the domain's keyword hits) as a prior. Keyword hits alone decide only
+    when no domain document matches (e.g. a bare hex code); the default is "style"."""
+    query_lower = query.lower()
+    hits = {domain: sum(1 for pattern in patterns if pattern.search(query_lower)) for domain, patterns in _DOMAIN_PATTERNS.items()}
+
+    totals = _route_scores_sqlite(query) if (backend or SEARCH_BACKEND) == "sqlite" else _route_scores(query, engine)
+    if totals:
+        scores = {domain: total * (1 + hits.get(domain, 0)) for domain, total in totals.items()}
+        return max(scores, key=scores.get)
+
+    best = max(hits, key=hits.get)
+    return best if hits[best] > 0 else "style"
 
 
-def search(query, domain=None, max_results=MAX_RESULTS):
+def search(query, domain=None, max_results=MAX_RESULTS, engine=None, backend=None):
     """Main search function with auto-domain detection"""
+    backend = backend or SEARCH_BACKEND
+    if domain == "all":
+        return search_all(query, max_results, engine, backend=backend)
     if domain is None:
-        domain = detect_domain(query)
+        domain = detect_domain(query, engine, backend)
 
     config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
     filepath = DATA_DIR / config["file"]
@@ -225,7 +781,11 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"File not found: {filepath}", "domain": domain}
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+    if backend == "sqlite":
+        results = _search_sqlite(domain if domain in CSV_CONFIG else "style", config["file"], config["search_cols"],
+                                 config["output_cols"], query, max_results)
+    else:
+        results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results, engine)
 
     return {
         "domain": domain,
@@ -236,7 +796,54 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     }
 
 
-def search_stack(query, stack, max_results=MAX_RESULTS):
+def search_many(requests, engine=None, backend=None):
+    """Run several domain searches at once: requests is a list of (query, domain, max_results)
+    tuples (domain None = auto-detect). Each domain's index is loaded once and all its queries
+    are scored together (sqlite: run over one connection and one table check per domain).
+    Returns {request: result}, each result shaped like search()."""
+    backend = backend or SEARCH_BACKEND
+    by_domain = defaultdict(list)
+    results = {}
+    for request in requests:
+        query, domain, max_results = request
+        if domain == "all":
+            results[request] = search_all(query, max_results, engine, backend=backend)
+        else:
+            by_domain[domain or detect_domain(query, engine, backend)].append(request)
+
+    for domain, domain_requests in by_domain.items():
+        config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
+        filepath = DATA_DIR / config["file"]
+
+        if not filepath.exists():
+            for request in domain_requests:
+                results[request] = {"error": f"File not found: {filepath}", "domain": domain}
+            continue
+
+        if backend == "sqlite":
+            batch = _search_sqlite_many(domain if domain in CSV_CONFIG else "style", config["file"], config["search_cols"],
+                                        config["output_cols"], [(query, max_results) for query, _, max_results in domain_requests])
+        else:
+            data, bm25 = _load_index(filepath, config["search_cols"])
+            queries = [query for query, _, _ in domain_requests]
+            ranked = _rank(bm25, queries, max(max_results for _, _, max_results in domain_requests), engine)
+            batch = [_result_rows(data, request_ranked, config["output_cols"], max_results)
+                     for request_ranked, (_, _, max_results) in zip(ranked, domain_requests)]
+
+        for request, rows in zip(domain_requests, batch):
+            query = request[0]
+            results[request] = {
+                "domain": domain,
+                "query": query,
+                "file": config["file"],
+                "count": len(rows),
+                "results": rows
+            }
+
+    return results
+
+
+def search_stack(query, stack, max_results=MAX_RESULTS, engine=None, backend=None):
     """Search stack-specific guidelines"""
     if stack not in STACK_CONFIG:
         return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
@@ -246,7 +853,11 @@ def search_stack(query, stack, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"Stack file not found: {filepath}", "stack": stack}
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
+    if (backend or SEARCH_BACKEND) == "sqlite":
+        results = _search_sqlite(f"stack:{stack}", STACK_CONFIG[stack]["file"], _STACK_COLS["search_cols"],
+                                 _STACK_COLS["output_cols"], query, max_results)
+    else:
+        results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results, engine)
 
     return {
         "domain": "stack",
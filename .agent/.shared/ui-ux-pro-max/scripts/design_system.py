@@ -13,12 +13,12 @@ Usage:
     result = generate_design_system("SaaS dashboard", "My Project", persist=True, page="dashboard")
 """
 
-import csv
 import json
 import os
+import re
 from datetime import datetime
 from pathlib import Path
-from core import search, DATA_DIR
+from core import search, search_many, load_compiled, DATA_DIR
 
 
 # ============ CONFIGURATION ============
@@ -38,58 +38,65 @@ class DesignSystemGenerator:
     """Generates design system recommendations from aggregated searches."""
 
     def __init__(self):
-        self.reasoning_data = self._load_reasoning()
+        self.reasoning_data, self.reasoning_index = self._load_reasoning()
 
-    def _load_reasoning(self) -> list:
-        """Load reasoning rules from CSV."""
+    def _load_reasoning(self) -> tuple:
+        """Load reasoning rules from CSV with their compiled lookup index (cached like the search indexes)."""
         filepath = DATA_DIR / REASONING_FILE
         if not filepath.exists():
-            return []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return list(csv.DictReader(f))
+            return [], _compile_reasoning([])
+        return load_compiled(filepath, "reasoning", _compile_reasoning)
 
-    def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
-        """Execute searches across multiple domains."""
-        results = {}
+    def _multi_domain_search(self, query: str, style_priority: list = None, skip: tuple = ()) -> dict:
+        """Execute searches across multiple domains in one batch (each data file is indexed once)."""
+        requests = {}
         for domain, config in SEARCH_CONFIG.items():
+            if domain in skip:
+                continue
             if domain == "style" and style_priority:
                 # For style, also search with priority keywords
                 priority_query = " ".join(style_priority[:2]) if style_priority else query
                 combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
+                requests[domain] = (combined_query, domain, config["max_results"])
             else:
-                results[domain] = search(query, domain, config["max_results"])
-        return results
+                requests[domain] = (query, domain, config["max_results"])
+        batch = search_many(list(requests.values()))
+        return {domain: batch[request] for domain, request in requests.items()}
 
-    def _find_reasoning_rule(self, category: str) -> dict:
-        """Find matching reasoning rule for a category."""
+    def _find_rule_index(self, category: str):
+        """Row index of the matching reasoning rule, or None (first rule wins at each stage)."""
+        index = self.reasoning_index
         category_lower = category.lower()
 
         # Try exact match first
-        for rule in self.reasoning_data:
-            if rule.get("UI_Category", "").lower() == category_lower:
-                return rule
-
-        # Try partial match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            if ui_cat in category_lower or category_lower in ui_cat:
-                return rule
+        if category_lower in index["names"]:
+            return index["names"][category_lower]
+
+        # Try partial match: a rule name inside the category, or the category inside a rule name.
+        # Trigram lookups narrow the rules to check; the substring test itself decides.
+        grams = _trigrams(category_lower)
+        candidates = [row for row in _contained_in(grams, index["trigrams"], index["trigram_counts"], index["short_names"])
+                      if index["lowered"][row] in category_lower]
+        candidates += [row for row in _containing(grams, index["trigrams"], len(index["lowered"]))
+                       if category_lower in index["lowered"][row]]
+        if candidates:
+            return min(candidates)
+
+        # Try keyword match: any word of a rule name inside the category
+        candidates = [index["keywords"][kw] for kw in _contained_in(grams, index["keyword_trigrams"], index["keyword_trigram_counts"], index["short_keywords"])
+                      if kw in category_lower]
+        return min(candidates) if candidates else None
 
-        # Try keyword match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            keywords = ui_cat.replace("/", " ").replace("-", " ").split()
-            if any(kw in category_lower for kw in keywords):
-                return rule
-
-        return {}
+    def _find_reasoning_rule(self, category: str) -> dict:
+        """Find matching reasoning rule for a category."""
+        rule_index = self._find_rule_index(category)
+        return self.reasoning_data[rule_index] if rule_index is not None else {}
 
     def _apply_reasoning(self, category: str, search_results: dict) -> dict:
         """Apply reasoning rules to search results."""
-        rule = self._find_reasoning_rule(category)
+        rule_index = self._find_rule_index(category)
 
-        if not rule:
+        if rule_index is None:
             return {
                 "pattern": "Hero + Features + CTA",
                 "style_priority": ["Minimalism", "Flat Design"],
@@ -101,23 +108,11 @@ class DesignSystemGenerator:
                 "severity": "MEDIUM"
             }
 
-        # Parse decision rules JSON
-        decision_rules = {}
-        try:
-            decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
-        except json.JSONDecodeError:
-            pass
-
-        return {
-            "pattern": rule.get("Recommended_Pattern", ""),
-            "style_priority": [s.strip() for s in rule.get("Style_Priority", "").split("+")],
-            "color_mood": rule.get("Color_Mood", ""),
-            "typography_mood": rule.get("Typography_Mood", ""),
-            "key_effects": rule.get("Key_Effects", ""),
-            "anti_patterns": rule.get("Anti_Patterns", ""),
-            "decision_rules": decision_rules,
-            "severity": rule.get("Severity", "MEDIUM")
-        }
+        # Copy the pre-parsed rule so callers cannot alter the shared index
+        reasoning = dict(self.reasoning_index["rules"][rule_index])
+        reasoning["style_priority"] = list(reasoning["style_priority"])
+        reasoning["decision_rules"] = dict(reasoning["decision_rules"])
+        return reasoning
 
     def _select_best_match(self, results: list, priority_keywords: list) -> dict:
         """Select best matching result based on priority keywords."""
@@ -174,7 +169,7 @@ class DesignSystemGenerator:
         style_priority = reasoning.get("style_priority", [])
 
         # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
+        search_results = self._multi_domain_search(query, style_priority, skip=("product",))
         search_results["product"] = product_result  # Reuse product search
 
         # Step 4: Select best matches from each domain using priority
@@ -458,6 +453,99 @@ def format_markdown(design_system: dict) -> str:
     return "\n".join(lines)
 
 
+# ============ REASONING INDEX ============
+def _trigrams(text: str) -> set:
+    """Distinct character trigrams of text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _contained_in(grams: set, gram_index: dict, gram_counts: dict, short: list) -> list:
+    """Entries all of whose trigrams are in grams (plus the entries too short to have any)."""
+    hits = {}
+    for gram in grams:
+        for entry in gram_index.get(gram, ()):
+            hits[entry] = hits.get(entry, 0) + 1
+    return [entry for entry, count in hits.items() if count == gram_counts[entry]] + short
+
+
+def _containing(grams: set, gram_index: dict, size: int):
+    """Entries whose trigrams include all of grams (every entry if grams is empty)."""
+    if not grams:
+        return range(size)
+    entries = None
+    for gram in grams:
+        found = set(gram_index.get(gram, ()))
+        entries = found if entries is None else entries & found
+        if not entries:
+            return ()
+    return entries
+
+
+def _compile_reasoning(rows: list) -> dict:
+    """
+    Compile reasoning rules into lookup tables; all sizes depend only on the CSV:
+      lowered          - lowercase UI_Category per row
+      names            - full UI_Category -> first row
+      trigrams         - character trigram of a UI_Category -> rows containing it
+      trigram_counts   - row -> number of distinct trigrams of its UI_Category
+      short_names      - rows whose UI_Category has no trigram (under 3 characters)
+      keywords         - word of a UI_Category (split on space, "/" and "-") -> first row
+      keyword_trigrams - trigram -> keywords containing it (with counts and short keywords as above)
+      rules            - per row, the parsed reasoning (Style_Priority split, Decision_Rules JSON decoded)
+    """
+    lowered, names, trigrams, trigram_counts, short_names, keywords, rules = [], {}, {}, {}, [], {}, []
+    for i, rule in enumerate(rows):
+        ui_cat = rule.get("UI_Category", "").lower()
+        lowered.append(ui_cat)
+        names.setdefault(ui_cat, i)
+        grams = _trigrams(ui_cat)
+        trigram_counts[i] = len(grams)
+        if not grams:
+            short_names.append(i)
+        for gram in grams:
+            trigrams.setdefault(gram, []).append(i)
+        for kw in ui_cat.replace("/", " ").replace("-", " ").split():
+            keywords.setdefault(kw, i)
+
+        # Parse decision rules JSON
+        decision_rules = {}
+        try:
+            decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
+        except json.JSONDecodeError:
+            pass
+
+        rules.append({
+            "pattern": rule.get("Recommended_Pattern", ""),
+            "style_priority": [s.strip() for s in rule.get("Style_Priority", "").split("+")],
+            "color_mood": rule.get("Color_Mood", ""),
+            "typography_mood": rule.get("Typography_Mood", ""),
+            "key_effects": rule.get("Key_Effects", ""),
+            "anti_patterns": rule.get("Anti_Patterns", ""),
+            "decision_rules": decision_rules,
+            "severity": rule.get("Severity", "MEDIUM")
+        })
+
+    keyword_trigrams, keyword_trigram_counts = {}, {}
+    for kw in keywords:
+        grams = _trigrams(kw)
+        keyword_trigram_counts[kw] = len(grams)
+        for gram in grams:
+            keyword_trigrams.setdefault(gram, []).append(kw)
+
+    return {
+        "lowered": lowered,
+        "names": names,
+        "trigrams": trigrams,
+        "trigram_counts": trigram_counts,
+        "short_names": short_names,
+        "keywords": keywords,
+        "keyword_trigrams": keyword_trigrams,
+        "keyword_trigram_counts": keyword_trigram_counts,
+        "short_keywords": [kw for kw, count in keyword_trigram_counts.items() if not count],
+        "rules": rules
+    }
+
+
 # ============ MAIN ENTRY POINT ============
 def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii", 
                            persist: bool = False, page: str = None, output_dir: str = None) -> str:
@@ -488,6 +576,12 @@ def generate_design_system(query: str, project_name: str = None, output_format:
 
 
 # ============ PERSISTENCE FUNCTIONS ============
+def slugify(name: str) -> str:
+    """File/folder name for a project or page: lowercase, runs of anything but letters, digits,
+    "-" and "_" collapsed to "-", so the result cannot contain a path separator or a parent reference"""
+    return re.sub(r"[^\w-]+", "-", (name or "").lower()).strip("-") or "default"
+
+
 def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None) -> dict:
     """
     Persist design system to design-system/<project>/ folder using Master + Overrides pattern.
@@ -505,7 +599,7 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
     
     # Use project name for project-specific folder
     project_name = design_system.get("project_name", "default")
-    project_slug = project_name.lower().replace(' ', '-')
+    project_slug = slugify(project_name)
     
     design_system_dir = base_dir / "design-system" / project_slug
     pages_dir = design_system_dir / "pages"
@@ -526,7 +620,7 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
     
     # If page is specified, create page override file with intelligent content
     if page:
-        page_file = pages_dir / f"{page.lower().replace(' ', '-')}.md"
+        page_file = pages_dir / f"{slugify(page)}.md"
         page_content = format_page_override_md(design_system, page, page_query)
         with open(page_file, 'w', encoding='utf-8') as f:
             f.write(page_content)
@@ -918,16 +1012,14 @@ def _generate_intelligent_overrides(page_name: str, page_query: str, design_syst
     Uses the existing search infrastructure to find relevant style, UX, and layout
     data instead of hardcoded page types.
     """
-    from core import search
-    
     page_lower = page_name.lower()
     query_lower = (page_query or "").lower()
     combined_context = f"{page_lower} {query_lower}"
     
-    # Search across multiple domains for page-specific guidance
-    style_search = search(combined_context, "style", max_results=1)
-    ux_search = search(combined_context, "ux", max_results=3)
-    landing_search = search(combined_context, "landing", max_results=1)
+    # Search across multiple domains for page-specific guidance, in one batch
+    requests = [(combined_context, "style", 1), (combined_context, "ux", 3), (combined_context, "landing", 1)]
+    batch = search_many(requests)
+    style_search, ux_search, landing_search = (batch[request] for request in requests)
     
     # Extract results from search response
     style_results = style_search.get("results", [])
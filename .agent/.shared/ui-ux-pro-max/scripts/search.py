@@ -7,16 +7,46 @@ Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-r
        python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard"]
 
 Domains: style, prompt, color, chart, landing, product, ux, typography
+         all (blended results across every domain and stack, from one unified index)
 Stacks: html-tailwind, react, nextjs
 
 Persistence (Master + Overrides pattern):
   --persist    Save design system to design-system/MASTER.md
   --page       Also create a page-specific override file in design-system/pages/
+
+Storage: --backend sqlite searches an SQLite FTS5 build of the CSVs (built on first use,
+or up front with --build-db) instead of parsing them.
+
+Resident mode: while `python server.py` is running, queries are answered by the daemon
+(warm indexes); otherwise they run in-process. --no-server forces in-process execution.
 """
 
 import argparse
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-from design_system import generate_design_system, persist_design_system
+import core
+import server
+from core import CSV_CONFIG, AVAILABLE_STACKS, BACKENDS, ENGINES, MAX_RESULTS, search, search_stack
+
+
+def run(method, fallback, use_server=True, **params):
+    """Run a method on the search daemon, or in-process when it is unreachable, times out or fails.
+    Daemon methods are read-only (files are only written by this process), so running the
+    request again in-process can never repeat a side effect."""
+    if use_server:
+        try:
+            return server.call(method, **params)
+        except (OSError, ValueError, server.ServerError):
+            pass
+    return fallback(**params)
+
+
+def _generate_design_system(**params):
+    from design_system import generate_design_system
+    return generate_design_system(**params)
+
+
+def _design_system(query, project_name=None):
+    from design_system import DesignSystemGenerator
+    return DesignSystemGenerator().generate(query, project_name)
 
 
 def format_output(result):
@@ -47,11 +77,15 @@ def format_output(result):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
-    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
+    parser.add_argument("query", nargs="?", help="Search query")
+    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()) + ["all"], help="Search domain (default: auto-detect; all = blended across domains, with either backend)")
     parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--engine", "-e", choices=ENGINES, default=None, help="Scoring engine (default: python, or $UIPRO_SEARCH_ENGINE)")
+    parser.add_argument("--backend", "-b", choices=BACKENDS, default=None, help="Storage backend (default: csv, or $UIPRO_SEARCH_BACKEND)")
+    parser.add_argument("--build-db", action="store_true", help="Compile all CSVs into the SQLite FTS5 database and exit")
+    parser.add_argument("--no-server", action="store_true", help="Always search in-process, even when server.py is running")
     # Design system generation
     parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name for design system output")
@@ -62,35 +96,46 @@ if __name__ == "__main__":
     parser.add_argument("--output-dir", "-o", type=str, default=None, help="Output directory for persisted files (default: current directory)")
 
     args = parser.parse_args()
+    if args.build_db:
+        sources = core.build_database()
+        print(f"Built {core.DB_PATH} ({len(sources)} sources)")
+        raise SystemExit(0)
+    if args.query is None:
+        parser.error("the following arguments are required: query")
+    if args.engine:
+        core.SEARCH_ENGINE = args.engine
+    if args.backend:
+        core.SEARCH_BACKEND = args.backend
+    use_server = not args.no_server
 
     # Design system takes priority
-    if args.design_system:
-        result = generate_design_system(
-            args.query, 
-            args.project_name, 
-            args.format,
-            persist=args.persist,
-            page=args.page,
-            output_dir=args.output_dir
-        )
-        print(result)
-        
+    if args.design_system and args.persist:
+        # Files are always written by this process; the daemon (if any) only generates the design system
+        from design_system import format_ascii_box, format_markdown, persist_design_system, slugify
+        design_system = run("design_system", _design_system, use_server, query=args.query, project_name=args.project_name)
+        persist_design_system(design_system, args.page, args.output_dir, args.query)
+        print(format_markdown(design_system) if args.format == "markdown" else format_ascii_box(design_system))
+
         # Print persistence confirmation
-        if args.persist:
-            project_slug = args.project_name.lower().replace(' ', '-') if args.project_name else "default"
-            print("\n" + "=" * 60)
-            print(f"✅ Design system persisted to design-system/{project_slug}/")
-            print(f"   📄 design-system/{project_slug}/MASTER.md (Global Source of Truth)")
-            if args.page:
-                page_filename = args.page.lower().replace(' ', '-')
-                print(f"   📄 design-system/{project_slug}/pages/{page_filename}.md (Page Overrides)")
-            print("")
-            print(f"📖 Usage: When building a page, check design-system/{project_slug}/pages/[page].md first.")
-            print(f"   If exists, its rules override MASTER.md. Otherwise, use MASTER.md.")
-            print("=" * 60)
+        project_slug = slugify(design_system.get("project_name", "default"))
+        print("\n" + "=" * 60)
+        print(f"✅ Design system persisted to design-system/{project_slug}/")
+        print(f"   📄 design-system/{project_slug}/MASTER.md (Global Source of Truth)")
+        if args.page:
+            page_filename = slugify(args.page)
+            print(f"   📄 design-system/{project_slug}/pages/{page_filename}.md (Page Overrides)")
+        print("")
+        print(f"📖 Usage: When building a page, check design-system/{project_slug}/pages/[page].md first.")
+        print(f"   If exists, its rules override MASTER.md. Otherwise, use MASTER.md.")
+        print("=" * 60)
+    elif args.design_system:
+        result = run("generate_design_system", _generate_design_system, use_server,
+                     query=args.query, project_name=args.project_name, output_format=args.format)
+        print(result)
     # Stack search
     elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
+        result = run("search_stack", search_stack, use_server,
+                     query=args.query, stack=args.stack, max_results=args.max_results, engine=args.engine, backend=args.backend)
         if args.json:
             import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -98,7 +143,8 @@ if __name__ == "__main__":
             print(format_output(result))
     # Domain search
     else:
-        result = search(args.query, args.domain, args.max_results)
+        result = run("search", search, use_server,
+                     query=args.query, domain=args.domain, max_results=args.max_results, engine=args.engine, backend=args.backend)
         if args.json:
             import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Server - resident search daemon with warm BM25 indexes
+Usage: python server.py [--host 127.0.0.1] [--port 47615]
+
+Protocol: one JSON object per line over a localhost TCP socket.
+  Request:  {"method": "search", "params": {"query": "fintech", "domain": "color"}}
+  Response: {"result": {...}} or {"error": "..."}
+Methods: ping, search, search_many, search_stack, design_system, generate_design_system
+
+The daemon is read-only: nothing a request sends makes it write files (search.py persists design
+systems itself). A connection is dropped at its first line that is not a JSON object, so HTTP
+requests a web page sends to the port are never executed.
+
+search.py uses the daemon when it is running and falls back to in-process search otherwise.
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import time
+
+# ============ CONFIGURATION ============
+SERVER_HOST = os.environ.get("UIPRO_SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.environ.get("UIPRO_SERVER_PORT", "47615"))
+CONNECT_TIMEOUT = 0.2   # Seconds to reach the daemon before falling back to in-process search
+REQUEST_TIMEOUT = 30    # Seconds to wait for a response once connected
+
+
+# ============ METHODS ============
+def _search(query, domain=None, max_results=None, engine=None, backend=None):
+    from core import MAX_RESULTS, search
+    return search(query, domain, max_results or MAX_RESULTS, engine, backend)
+
+
+def _search_many(requests, engine=None, backend=None):
+    """JSON has no tuples: requests are [query, domain, max_results] lists, results come back in order"""
+    from core import search_many
+    requests = [tuple(request) for request in requests]
+    results = search_many(requests, engine, backend)
+    return [results[request] for request in requests]
+
+
+def _search_stack(query, stack, max_results=None, engine=None, backend=None):
+    from core import MAX_RESULTS, search_stack
+    return search_stack(query, stack, max_results or MAX_RESULTS, engine, backend)
+
+
+def _design_system(query, project_name=None):
+    """The design system dict, for clients that persist or format it themselves"""
+    from design_system import DesignSystemGenerator
+    return DesignSystemGenerator().generate(query, project_name)
+
+
+def _generate_design_system(query, project_name=None, output_format="ascii"):
+    """Formatted design system; persisting is not offered over the socket"""
+    from design_system import generate_design_system
+    return generate_design_system(query, project_name, output_format)
+
+
+METHODS = {
+    "ping": lambda: "pong",
+    "search": _search,
+    "search_many": _search_many,
+    "search_stack": _search_stack,
+    "design_system": _design_system,
+    "generate_design_system": _generate_design_system,
+}
+
+
+def warm_up():
+    """Load every domain and stack index (and the optional NumPy engine) into memory"""
+    import core
+    import design_system  # noqa: F401  (imported once, not per request)
+    for config in list(core.CSV_CONFIG.values()) + list(core.STACK_CONFIG.values()):
+        filepath = core.DATA_DIR / config["file"]
+        search_cols = config.get("search_cols", core._STACK_COLS["search_cols"])
+        if filepath.exists():
+            data, bm25 = core._load_index(filepath, search_cols)
+            core._rank(bm25, [""], 1)
+    core._load_unified_index()
+
+
+# ============ SERVER ============
+class SearchHandler(socketserver.StreamRequestHandler):
+    """Answers JSON-line requests until the client closes the connection"""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError:
+                return
+            if not isinstance(request, dict):
+                return
+            try:
+                method = METHODS[request["method"]]
+                response = {"result": method(**request.get("params", {}))}
+            except KeyError as e:
+                response = {"error": f"Unknown method or missing field: {e}"}
+            except Exception as e:
+                response = {"error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class SearchServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    request_queue_size = 128  # Listen backlog: parallel agents connect in bursts
+
+
+def serve(host=SERVER_HOST, port=SERVER_PORT):
+    """Warm the indexes, then serve until interrupted"""
+    started = time.perf_counter()
+    warm_up()
+    with SearchServer((host, port), SearchHandler) as server:
+        print(f"UI Pro Max server listening on {host}:{port} (indexes warmed in {time.perf_counter() - started:.2f}s)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+# ============ CLIENT ============
+class ServerError(Exception):
+    """The daemon answered with an error"""
+
+
+def call(method, host=SERVER_HOST, port=SERVER_PORT, **params):
+    """Run one method on the daemon. Raises OSError when it is not reachable, ServerError when it fails."""
+    with socket.create_connection((host, port), timeout=CONNECT_TIMEOUT) as sock:
+        sock.settimeout(REQUEST_TIMEOUT)
+        sock.sendall(json.dumps({"method": method, "params": params}).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as stream:
+            line = stream.readline()
+    if not line:
+        raise ConnectionError("Server closed the connection without a response")
+    response = json.loads(line)
+    if "error" in response:
+        raise ServerError(response["error"])
+    return response["result"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max search daemon")
+    parser.add_argument("--host", default=SERVER_HOST, help=f"Interface to bind (default: {SERVER_HOST}, or $UIPRO_SERVER_HOST)")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help=f"Port to listen on (default: {SERVER_PORT}, or $UIPRO_SERVER_PORT)")
+    args = parser.parse_args()
+    serve(args.host, args.port)
@@ -1,18 +1,41 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
 import os
+import sys
 import json
-from datetime import datetime, timedelta
+import asyncio
+import collections
+import functools
+import inspect
+import gzip
+import hashlib
+import heapq
+import itertools
+import math
+import random
+import re
+import sqlite3
+import threading
+import time
+import zlib
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ET
+from array import array
+from statistics import NormalDist
+from datetime import datetime, timedelta, timezone
 
 import google.auth
 from google.auth.transport.requests import Request
 from google.oauth2 import service_account
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
 
 # MCP
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 
 mcp = FastMCP("gsc-server")
 
@@ -41,15 +64,175 @@ SKIP_OAUTH = os.environ.get("GSC_SKIP_OAUTH", "").lower() in ("true", "1", "yes"
 
 SCOPES = ["https://www.googleapis.com/auth/webmasters"]
 
-def get_gsc_service():
+# Idle keep-alive connections kept for reuse by parallel API calls
+HTTP_POOL_SIZE = 16
+
+# URL Inspection API allows 2000 inspections per property per day
+MAX_INSPECTIONS_PER_RUN = 2000
+MAX_INSPECTION_CONCURRENCY = 10
+
+# Partial response masks for URL inspection, matching what each tool reads. The AMP and
+# mobile usability sections are never used. (Responses are already gzip-encoded: the API
+# client sends "Accept-Encoding: gzip" and a "(gzip)" user agent on every request.)
+INSPECTION_FIELDS_ENHANCED = "inspectionResult(inspectionResultLink,indexStatusResult,richResultsResult)"
+INSPECTION_FIELDS_BATCH = (
+    "inspectionResult(indexStatusResult(verdict,coverageState,lastCrawlTime),"
+    "richResultsResult(verdict,detectedItems/richResultType))"
+)
+INSPECTION_FIELDS_ISSUES = (
+    "inspectionResult/indexStatusResult"
+    "(verdict,coverageState,googleCanonical,userCanonical,robotsTxtState,pageFetchState)"
+)
+
+# Sitemap streaming settings
+SITEMAP_NAMESPACES = ("", "http://www.sitemaps.org/schemas/sitemap/0.9", "http://www.google.com/schemas/sitemap/0.84")
+MAX_SITEMAP_DEPTH = 3  # How many levels of nested sitemap indexes to follow
+SITEMAP_FETCH_TIMEOUT = 30
+SITEMAP_READ_BATCH = 256  # Sitemap entries handed from the parser thread to the event loop at a time
+
+# Inspection ledger (last inspection of each URL) used by incremental audits
+LEDGER_PATH = os.environ.get("GSC_LEDGER_PATH") or os.path.join(SCRIPT_DIR, "inspection_ledger.sqlite3")
+
+# Search Analytics API returns at most 25,000 rows per request
+ANALYTICS_PAGE_SIZE = 25000
+MAX_ANALYTICS_ROWS = 250000
+
+# Tools analysing whole datasets (entity x day, query x page) may fetch more than the others
+MAX_BULK_ANALYTICS_ROWS = 2000000
+ANOMALY_CHUNK_ROWS = 4096  # Series scored per vectorized block, bounds peak memory
+DATA_LAG_DAYS = 3  # The most recent days in Search Console are still incomplete
+
+# Minimum seconds between progress notifications sent by long-running tools
+PROGRESS_INTERVAL = 2.0
+
+# Default time budget of long-running tools, in seconds. Override per tool with
+# GSC_TOOL_DEADLINE_<TOOL_NAME> (e.g. GSC_TOOL_DEADLINE_INSPECT_SITEMAP_URLS=600)
+TOOL_DEADLINE_SECONDS = float(os.environ.get("GSC_TOOL_DEADLINE_SECONDS", "120"))
+DEADLINE_MIN_CALL_SECONDS = 1.0  # No API call is started with less time than this left
+
+# How long cached API responses stay valid, in seconds
+CACHE_TTL_SECONDS = {
+    "sites": 600,
+    "sitemaps": 900,
+    "analytics": 3600,
+    "inspection": 900
+}
+
+# Response cache shared by all server processes on this machine
+CACHE_PATH = os.environ.get("GSC_CACHE_PATH") or os.path.join(SCRIPT_DIR, "response_cache.sqlite3")
+CACHE_LEASE_SECONDS = 60  # How long other processes wait for one process's in-flight fetch
+CACHE_LEASE_POLL_SECONDS = 0.2
+CACHE_PURGE_INTERVAL_SECONDS = 300  # Expired responses and leases are deleted on a write at most this often
+
+# Optional warm-up at server start: prefetch properties, sitemaps and recent top-line metrics
+WARMUP_ENABLED = os.environ.get("GSC_WARMUP", "").lower() in ("true", "1", "yes")
+WARMUP_DAYS = int(os.environ.get("GSC_WARMUP_DAYS", "28"))
+WARMUP_PAUSE_SECONDS = 0.5  # Pause between warm-up calls so interactive calls go first
+
+# Query topic clustering: MinHash signatures split into LSH bands
+MINHASH_PERMUTATIONS = 36
+MINHASH_PRIME = (1 << 31) - 1
+LSH_BANDS = 12  # 3 rows per band: 80% of pairs with 50% word overlap become candidates
+QUERY_CLUSTER_SIMILARITY = 0.5  # Minimum estimated word overlap (Jaccard) to join a cluster
+LSH_BUCKET_SIZE = 64  # Leaders kept per bucket; buckets of very common words stop growing
+LSH_VERIFY_CANDIDATES = 3  # Leaders sharing the most bands whose full signatures are compared
+
+# Index coverage sampling
+MAX_SAMPLE_STRATA = 50  # Further strata are pooled into a single "(other)" stratum
+ID_SEGMENT_PATTERN = re.compile(r"\d|^[0-9a-f]{16,}$", re.IGNORECASE)
+
+class HttpPool:
+    """
+    Thread-safe stand-in for the httplib2.Http object of the API client.
+
+    httplib2.Http is not thread-safe, so each request leases an idle Http object (holding one
+    keep-alive connection per host) and hands it back when done. Parallel calls therefore never
+    share a connection, while later calls reuse warm TCP/TLS connections instead of opening new ones.
     """
-    Returns an authorized Search Console service object.
+
+    def __init__(self, max_idle: int = HTTP_POOL_SIZE):
+        self.max_idle = max_idle
+        self._idle: List[Any] = []
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    def request(self, *args, **kwargs):
+        with self._lock:
+            http = self._idle.pop() if self._idle else None
+            self.requests += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+        if http is None:
+            http = build_http()
+
+        # Sockets before the call; a new socket afterwards means a new connection (or reconnect)
+        sockets = {key: conn.sock for key, conn in http.connections.items()}
+        try:
+            return http.request(*args, **kwargs)
+        finally:
+            opened = sum(
+                1 for key, conn in http.connections.items()
+                if conn.sock is not None and conn.sock is not sockets.get(key)
+            )
+            with self._lock:
+                self.connections_opened += opened
+                self.in_use -= 1
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(http)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "idle": len(self._idle),
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use
+            }
+
+_http_pool = HttpPool()
+_service = None
+_service_lock = threading.Lock()
+
+def _build_service(creds):
+    """
+    Builds a Search Console service object sending its requests through the shared connection pool.
+    """
+    return build("searchconsole", "v1", http=AuthorizedHttp(creds, http=_http_pool))
+
+class InteractiveAuthRequired(Exception):
+    """
+    OAuth needs the user's consent in a browser, which a non-interactive caller must not start.
+    """
+
+def get_gsc_service(interactive: bool = True):
+    """
+    Returns the authorized Search Console service object, shared by all tools and threads.
+    Credentials are loaded on first use: first tries OAuth, then falls back to service account.
+    With interactive=False (background threads) InteractiveAuthRequired is raised instead of
+    starting the OAuth consent flow.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = _build_service(_get_credentials(interactive))
+        return _service
+
+def _get_credentials(interactive: bool = True):
+    """
+    Returns credentials for the Search Console API.
     First tries OAuth authentication, then falls back to service account.
     """
     # Try OAuth authentication first if not skipped
     if not SKIP_OAUTH:
         try:
-            return get_gsc_service_oauth()
+            return _get_oauth_credentials(interactive)
+        except InteractiveAuthRequired:
+            # An interactive call would have asked for consent rather than used the service account
+            raise
         except Exception as e:
             # If OAuth fails, try service account
             print(f"OAuth authentication failed: {str(e)}")
@@ -59,10 +242,9 @@ def get_gsc_service():
     for cred_path in POSSIBLE_CREDENTIAL_PATHS:
         if cred_path and os.path.exists(cred_path):
             try:
-                creds = service_account.Credentials.from_service_account_file(
+                return service_account.Credentials.from_service_account_file(
                     cred_path, scopes=SCOPES
                 )
-                return build("searchconsole", "v1", credentials=creds)
             except Exception as e:
                 continue  # Try the next path if this one fails
     
@@ -78,6 +260,12 @@ def get_gsc_service_oauth():
     """
     Returns an authorized Search Console service object using OAuth.
     """
+    return _build_service(_get_oauth_credentials())
+
+def _get_oauth_credentials(interactive: bool = True):
+    """
+    Returns OAuth user credentials, refreshing the stored token or running the consent flow as needed.
+    """
     creds = None
     
     # Check if token file exists
@@ -114,6 +302,9 @@ def get_gsc_service_oauth():
                     f"or set the GSC_OAUTH_CLIENT_SECRETS_FILE environment variable."
                 )
             
+            if not interactive:
+                raise InteractiveAuthRequired("OAuth consent is required; call any tool to sign in")
+            
             # Start OAuth flow
             flow = InstalledAppFlow.from_client_secrets_file(OAUTH_CLIENT_SECRETS_FILE, SCOPES)
             creds = flow.run_local_server(port=0)
@@ -122,8 +313,1214 @@ def get_gsc_service_oauth():
             with open(TOKEN_FILE, 'w') as token:
                 token.write(creds.to_json())
     
-    # Build and return the service
-    return build("searchconsole", "v1", credentials=creds)
+    return creds
+
+class ToolProgress:
+    """
+    Reports the progress of a long-running tool call to the MCP client.
+
+    Sends progress notifications (which also keep the client from timing out and retrying)
+    and, alongside them, a log message with the estimated time remaining and a summary of
+    the partial results so far. Without a request context it only keeps count.
+    """
+
+    def __init__(
+        self,
+        ctx: Optional[Context],
+        total: Optional[float] = None,
+        unit: str = "items",
+        describe: Optional[Callable[[], str]] = None
+    ):
+        self.ctx = ctx
+        self.total = total
+        self.unit = unit
+        self.describe = describe
+        self.done = 0
+        self.started = time.monotonic()
+        self._last_sent = 0.0
+
+    def remaining_seconds(self) -> Optional[float]:
+        if not self.total or not self.done:
+            return None
+        elapsed = time.monotonic() - self.started
+        return max(0.0, elapsed / self.done * (self.total - self.done))
+
+    def status(self) -> str:
+        parts = [f"{self.done:g}{f'/{self.total:g}' if self.total else ''} {self.unit}"]
+        remaining = self.remaining_seconds()
+        if remaining is not None:
+            parts.append(f"~{remaining:.0f}s remaining")
+        if self.describe:
+            parts.append(f"so far: {self.describe()}")
+        return ", ".join(parts)
+
+    async def advance(self, step: float = 1) -> None:
+        self.done += step
+        if self.ctx is None:
+            return
+
+        now = time.monotonic()
+        finished = self.total is not None and self.done >= self.total
+        if not finished and now - self._last_sent < PROGRESS_INTERVAL:
+            return
+        self._last_sent = now
+
+        try:
+            await self.ctx.report_progress(self.done, self.total)
+            await self.ctx.info(self.status())
+        except Exception:
+            # Progress is best effort and must never fail the tool call itself
+            pass
+
+class DeadlineExceeded(Exception):
+    """
+    The time budget of a tool call ran out. Distinct from TimeoutError, which since Python 3.10
+    is also what a socket timeout of the API call itself raises.
+    """
+
+def _deliver_late(on_late: Optional[Callable[[Any], None]], future: asyncio.Future) -> None:
+    if future.cancelled() or future.exception() is not None or on_late is None:
+        return
+    on_late(future.result())
+
+async def _run_in_thread(func: Callable[..., Any], *args, on_late: Optional[Callable[[Any], None]] = None) -> Any:
+    """
+    Runs a blocking call in a worker thread. A thread cannot be stopped: if the caller is cancelled
+    (deadline, client gave up) the call still finishes, and on_late(result) then receives its result
+    so the quota it spent is not lost.
+    """
+    future = asyncio.ensure_future(asyncio.to_thread(func, *args))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        future.add_done_callback(functools.partial(_deliver_late, on_late))
+        raise
+
+class Deadline:
+    """
+    Time budget of a tool call. API calls that would run past it are abandoned so the
+    tool can still return its partial results in time.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def for_tool(cls, tool_name: str, seconds: Optional[float] = None) -> "Deadline":
+        """
+        Returns the deadline of a tool call: the explicit budget if given, else the configured one.
+        """
+        if not seconds or seconds <= 0:
+            seconds = float(os.environ.get(f"GSC_TOOL_DEADLINE_{tool_name.upper()}", TOOL_DEADLINE_SECONDS))
+        return cls(seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    async def run(self, func: Callable[..., Any], *args, on_late: Optional[Callable[[Any], None]] = None) -> Any:
+        """
+        Runs a blocking API call in a worker thread. Raises DeadlineExceeded if less than
+        DEADLINE_MIN_CALL_SECONDS are left (the call is then not started) or if the deadline
+        passes first, in which case the call's result goes to on_late when it arrives.
+        A TimeoutError raised by the call itself propagates unchanged.
+        """
+        if self.remaining() < DEADLINE_MIN_CALL_SECONDS:
+            raise DeadlineExceeded
+        try:
+            async with asyncio.timeout(self.remaining()) as scope:
+                return await _run_in_thread(func, *args, on_late=on_late)
+        except TimeoutError:
+            if scope.expired():
+                raise DeadlineExceeded from None
+            raise
+
+# Running calls of deduplicated tools: key -> [task, number of callers waiting on it]
+_inflight_calls: Dict[str, list] = {}
+
+def deduplicate_calls(tool: Callable[..., Awaitable[str]]) -> Callable[..., Awaitable[str]]:
+    """
+    Decorator for slow tools: while a call is running, an identical call (same arguments,
+    e.g. a client retrying after a timeout) waits for the running one instead of starting
+    a duplicate that spends the same quota again. The call is cancelled once every caller
+    waiting on it has been cancelled.
+    """
+    signature = inspect.signature(tool)
+    context_params = {name for name, param in signature.parameters.items() if param.annotation is Context}
+
+    @functools.wraps(tool)
+    async def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = {name: value for name, value in bound.arguments.items() if name not in context_params}
+        key = tool.__name__ + json.dumps(arguments, sort_keys=True, default=str)
+
+        call = _inflight_calls.get(key)
+        if call is None:
+            task = asyncio.ensure_future(tool(*args, **kwargs))
+            call = _inflight_calls[key] = [task, 0]
+            task.add_done_callback(lambda _: _inflight_calls.pop(key, None))
+
+        task = call[0]
+        call[1] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # The client cancelled or gave up; stop spending quota unless someone else still waits
+            if call[1] == 1:
+                task.cancel()
+            raise
+        finally:
+            call[1] -= 1
+
+    return wrapper
+
+def _connect_shared_db(path: str) -> sqlite3.Connection:
+    """
+    Opens a SQLite database that several server processes may read and write at once.
+    WAL lets readers proceed while another process writes; writers wait on the busy timeout.
+    """
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+class ResponseCache:
+    """
+    On-disk cache of API responses with a per-entry time to live, shared by every server
+    process on the machine so that one process's fetch warms all the others.
+
+    Lease rows act as advisory locks: the process holding the lease on a key fetches it,
+    the others wait for its result instead of spending quota on the same request.
+    """
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self.owner = f"{os.getpid()}"
+        self._lock = threading.Lock()
+        self._conn = _connect_shared_db(path)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                expires_at REAL NOT NULL,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS leases (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            """
+        )
+        self._last_purge = 0.0
+        with self._lock:
+            self._purge_expired()
+        self.hits = 0
+        self.misses = 0
+
+    def _purge_expired(self) -> None:
+        """
+        Deletes expired responses and leases. Called with the lock held.
+        """
+        now = time.time()
+        self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+        self._conn.execute("DELETE FROM leases WHERE expires_at < ?", (now,))
+        self._last_purge = time.monotonic()
+
+    def peek(self, key: str) -> Optional[Any]:
+        """
+        Returns a live entry without counting it as a hit or a miss.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.peek(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, time.time() + ttl, json.dumps(value))
+            )
+            # A long-running server would otherwise keep every expired response until its next start
+            if time.monotonic() - self._last_purge > CACHE_PURGE_INTERVAL_SECONDS:
+                self._purge_expired()
+
+    def invalidate(self, prefix: str) -> None:
+        """
+        Drops every entry whose key starts with prefix.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+    def entries(self, prefix: str) -> List[tuple]:
+        """
+        Returns (key, expires_at, value) of every live entry whose key starts with prefix.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, expires_at, value FROM responses WHERE substr(key, 1, ?) = ? AND expires_at >= ?",
+                (len(prefix), prefix, time.time())
+            ).fetchall()
+        return [(key, expires_at, json.loads(value)) for key, expires_at, value in rows]
+
+    def keys(self, prefix: str) -> List[str]:
+        """
+        Returns the keys of every live entry whose key starts with prefix, without reading the values.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM responses WHERE substr(key, 1, ?) = ? AND expires_at >= ?",
+                (len(prefix), prefix, time.time())
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def version(self, prefix: str) -> tuple:
+        """
+        Returns (count, latest expiry) of the live entries whose key starts with prefix. It changes
+        whenever one of them is written, invalidated or expires, and is read without the values.
+        """
+        with self._lock:
+            return tuple(self._conn.execute(
+                "SELECT COUNT(*), MAX(expires_at) FROM responses WHERE substr(key, 1, ?) = ? AND expires_at >= ?",
+                (len(prefix), prefix, time.time())
+            ).fetchone())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses WHERE expires_at >= ?", (time.time(),)).fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def acquire_lease(self, key: str, seconds: float) -> bool:
+        """
+        Takes the fetch lease on a key unless another live owner holds it.
+        Leases of crashed processes simply expire.
+        """
+        owner = f"{self.owner}:{threading.get_ident()}"
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE leases.expires_at < ?
+                """,
+                (key, owner, now + seconds, now)
+            )
+            row = self._conn.execute("SELECT owner FROM leases WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] == owner
+
+    def release_lease(self, key: str) -> None:
+        owner = f"{self.owner}:{threading.get_ident()}"
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+_response_cache: Optional[ResponseCache] = None
+
+def get_response_cache() -> ResponseCache:
+    """
+    Returns the process-wide handle on the shared response cache, opening it on first use.
+    """
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+def _cache_key(kind: str, site_url: str = "", params: Any = None) -> str:
+    return f"{kind}|{site_url}|{json.dumps(params, sort_keys=True)}"
+
+def _cached_execute(kind: str, request, site_url: str = "", params: Any = None) -> Dict[str, Any]:
+    """
+    Executes an API request unless an identical one (same kind, site and params) was
+    answered recently, by this or any other server process, in which case the cached
+    response is returned.
+    """
+    cache = get_response_cache()
+    key = _cache_key(kind, site_url, params)
+    response = cache.get(key)
+    if response is not None:
+        return response
+
+    # If another process is already fetching this response, wait for its result
+    wait_until = time.monotonic() + CACHE_LEASE_SECONDS
+    while not cache.acquire_lease(key, CACHE_LEASE_SECONDS):
+        time.sleep(CACHE_LEASE_POLL_SECONDS)
+        response = cache.peek(key)
+        if response is not None:
+            return response
+        if time.monotonic() > wait_until:
+            break
+
+    try:
+        response = request.execute()
+        cache.set(key, response, CACHE_TTL_SECONDS[kind])
+    finally:
+        cache.release_lease(key)
+    return response
+
+class SitemapEntry(NamedTuple):
+    """A single <url> entry of a sitemap."""
+    loc: str
+    lastmod: Optional[str] = None
+
+def _sitemap_tag(tag: str) -> Optional[str]:
+    """
+    Returns the local name of a sitemap protocol tag, or None for tags from extension
+    namespaces (e.g. image:loc), which must not be mistaken for page URLs.
+    """
+    namespace, _, local_name = tag[1:].rpartition("}") if tag.startswith("{") else ("", "", tag)
+    return local_name if namespace in SITEMAP_NAMESPACES else None
+
+def _is_remote_sitemap(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+def _open_sitemap(source: str):
+    """
+    Opens a sitemap from a local path or an http(s) URL as a binary stream.
+    """
+    if _is_remote_sitemap(source):
+        # Gzip content encoding is undone by the magic byte check in iter_sitemap_urls
+        request = urllib.request.Request(source, headers={"User-Agent": "mcp-gsc sitemap reader", "Accept-Encoding": "gzip"})
+        return urllib.request.urlopen(request, timeout=SITEMAP_FETCH_TIMEOUT)
+    return open(source, "rb")
+
+def iter_sitemap_urls(source: str, max_depth: int = MAX_SITEMAP_DEPTH, _seen: Optional[set] = None) -> Iterator[SitemapEntry]:
+    """
+    Incrementally parses a sitemap and yields its URL entries.
+
+    Parsing is done with iterparse and every finished element is cleared, so memory stays
+    constant no matter how many URLs the sitemap holds. Gzipped sitemaps are detected by their
+    magic bytes, and sitemap indexes are followed up to max_depth levels deep. A sitemap fetched
+    over the network only leads to http(s) children, never to local files.
+    """
+    seen = set() if _seen is None else _seen
+    if source in seen:
+        return
+    seen.add(source)
+
+    raw = _open_sitemap(source)
+    stream = gzip.GzipFile(fileobj=raw) if raw.peek(2)[:2] == b"\x1f\x8b" else raw
+    child_sitemaps = []
+
+    try:
+        root = None
+        loc = lastmod = None
+        for event, elem in ET.iterparse(stream, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                continue
+
+            tag = _sitemap_tag(elem.tag)
+            if tag == "loc":
+                loc = (elem.text or "").strip()
+            elif tag == "lastmod":
+                lastmod = (elem.text or "").strip() or None
+            elif tag == "url":
+                if loc:
+                    yield SitemapEntry(loc, lastmod)
+                loc = lastmod = None
+                root.clear()
+            elif tag == "sitemap":
+                # Child sitemaps are read after this index is closed, so a slow consumer
+                # never holds two remote connections open at once
+                if loc:
+                    child_sitemaps.append(loc)
+                loc = lastmod = None
+                root.clear()
+    finally:
+        stream.close()
+        raw.close()
+
+    if max_depth > 0:
+        remote = _is_remote_sitemap(source)
+        for child in child_sitemaps:
+            if remote and not _is_remote_sitemap(child):
+                continue
+            yield from iter_sitemap_urls(child, max_depth - 1, seen)
+
+def _inspect_url(service, site_url: str, page_url: str, fields: Optional[str] = INSPECTION_FIELDS_ISSUES) -> Dict[str, Any]:
+    """
+    Runs a single URL Inspection API call, requesting only the response fields in the mask.
+    Recent results are shared through the response cache.
+    """
+    request = {
+        "inspectionUrl": page_url,
+        "siteUrl": site_url
+    }
+    return _cached_execute(
+        "inspection",
+        service.urlInspection().index().inspect(body=request, fields=fields),
+        site_url,
+        {"url": page_url, "fields": fields}
+    )
+
+async def _inspect_concurrently(
+    site_url: str,
+    entries: Iterable[SitemapEntry],
+    on_result: Callable[[SitemapEntry, Optional[Dict[str, Any]], Optional[Exception]], None],
+    concurrency: int = 4,
+    progress: Optional[ToolProgress] = None,
+    deadline: Optional[Deadline] = None,
+    on_late: Optional[Callable[[SitemapEntry, Dict[str, Any]], None]] = None
+) -> bool:
+    """
+    Feeds entries through a bounded queue into concurrent URL inspection workers.
+
+    Entries are pulled lazily from the iterator in a worker thread, so a streaming sitemap is
+    never materialised. The service object is built once, before the workers start, and shared
+    by them: every call leases its own connection from the HTTP pool. on_result(entry, response, error) is called on the event loop.
+
+    Returns False if the deadline passed first: queued entries are then dropped and no new call
+    is started within DEADLINE_MIN_CALL_SECONDS of it. Calls still in flight (also when the caller
+    is cancelled) finish in their threads and their successful responses go to on_late(entry, response).
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    entries = iter(entries)
+    stopped = False
+    service = await asyncio.to_thread(get_gsc_service)
+
+    async def produce():
+        while True:
+            batch = await asyncio.to_thread(lambda: list(itertools.islice(entries, SITEMAP_READ_BATCH)))
+            for entry in batch:
+                await queue.put(entry)
+            if len(batch) < SITEMAP_READ_BATCH:
+                break
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def consume():
+        nonlocal stopped
+        while (entry := await queue.get()) is not None:
+            if deadline is not None and deadline.remaining() < DEADLINE_MIN_CALL_SECONDS:
+                stopped = True
+                return
+            try:
+                late = functools.partial(on_late, entry) if on_late is not None else None
+                response = await _run_in_thread(_inspect_url, service, site_url, entry.loc, on_late=late)
+            except Exception as e:
+                on_result(entry, None, e)
+            else:
+                on_result(entry, response, None)
+            if progress is not None:
+                await progress.advance()
+
+    try:
+        async with asyncio.timeout(deadline.remaining() if deadline else None) as scope:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(produce())
+                for _ in range(concurrency):
+                    group.create_task(consume())
+    except TimeoutError:
+        if not scope.expired():
+            raise
+        return False
+    except ExceptionGroup as eg:
+        # Surface the original error (e.g. sitemap not found) rather than the group wrapper
+        raise eg.exceptions[0]
+    return not stopped
+
+def _parse_w3c_datetime(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parses a sitemap lastmod (W3C datetime, possibly date-only) into an aware UTC datetime.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+class InspectionLedger:
+    """
+    Local SQLite record of the last inspection of each URL: when it ran, its verdict,
+    the sitemap lastmod seen at that time and the raw response.
+    """
+
+    def __init__(self, path: str = LEDGER_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        # Entries are looked up from the sitemap reader thread and recorded from the event loop,
+        # possibly by several server processes sharing the same ledger file
+        self._conn = _connect_shared_db(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS inspections (
+                site_url TEXT NOT NULL,
+                page_url TEXT NOT NULL,
+                inspected_at TEXT NOT NULL,
+                verdict TEXT,
+                lastmod TEXT,
+                response TEXT,
+                PRIMARY KEY (site_url, page_url)
+            )
+            """
+        )
+
+    def get(self, site_url: str, page_url: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the ledger record for a URL, or None if it was never inspected.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT inspected_at, verdict, lastmod, response FROM inspections WHERE site_url = ? AND page_url = ?",
+                (site_url, page_url)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "inspected_at": row[0],
+            "verdict": row[1],
+            "lastmod": row[2],
+            "response": json.loads(row[3]) if row[3] else None
+        }
+
+    def record(self, site_url: str, entry: SitemapEntry, response: Dict[str, Any]) -> None:
+        """
+        Stores the result of a successful inspection.
+        """
+        verdict = (response or {}).get("inspectionResult", {}).get("indexStatusResult", {}).get("verdict", "UNKNOWN")
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO inspections (site_url, page_url, inspected_at, verdict, lastmod, response)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (site_url, page_url) DO UPDATE SET
+                    inspected_at = excluded.inspected_at,
+                    verdict = excluded.verdict,
+                    lastmod = COALESCE(excluded.lastmod, inspections.lastmod),
+                    response = excluded.response
+                """,
+                (site_url, entry.loc, datetime.now(timezone.utc).isoformat(), verdict, entry.lastmod, json.dumps(response))
+            )
+
+    def records(self, site_url: str) -> List[Dict[str, Any]]:
+        """
+        Returns every ledger record of a site, ordered by URL.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page_url, inspected_at, verdict, lastmod, response FROM inspections WHERE site_url = ? ORDER BY page_url",
+                (site_url,)
+            ).fetchall()
+        return [
+            {
+                "page_url": row[0],
+                "inspected_at": row[1],
+                "verdict": row[2],
+                "lastmod": row[3],
+                "response": json.loads(row[4]) if row[4] else None
+            }
+            for row in rows
+        ]
+
+    def sites(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT site_url FROM inspections")]
+
+    def version(self, site_url: str) -> tuple:
+        """
+        Returns (count, latest inspected_at) of a site's records, which changes with every record stored.
+        """
+        with self._lock:
+            return tuple(self._conn.execute(
+                "SELECT COUNT(*), MAX(inspected_at) FROM inspections WHERE site_url = ?", (site_url,)
+            ).fetchone())
+
+    @staticmethod
+    def needs_inspection(record: Optional[Dict[str, Any]], entry: SitemapEntry, max_age_days: int) -> bool:
+        """
+        Decides whether a URL has to be inspected again: it is new, previously failing,
+        changed according to its sitemap lastmod, or its last inspection is too old.
+        """
+        if record is None or record["response"] is None or record["verdict"] != "PASS":
+            return True
+
+        inspected_at = _parse_w3c_datetime(record["inspected_at"])
+        if inspected_at is None or datetime.now(timezone.utc) - inspected_at > timedelta(days=max_age_days):
+            return True
+
+        if entry.lastmod and entry.lastmod != record["lastmod"]:
+            lastmod = _parse_w3c_datetime(entry.lastmod)
+            # An unparseable lastmod that differs from the last one seen is treated as a change
+            return lastmod is None or lastmod > inspected_at
+
+        return False
+
+_inspection_ledger: Optional[InspectionLedger] = None
+
+def get_inspection_ledger() -> InspectionLedger:
+    """
+    Returns the process-wide inspection ledger, opening it on first use.
+    """
+    global _inspection_ledger
+    if _inspection_ledger is None:
+        _inspection_ledger = InspectionLedger()
+    return _inspection_ledger
+
+# Hash functions must be identical in every process sharing stored signatures, hence the fixed seed
+_minhash_rng = random.Random(MINHASH_PERMUTATIONS)
+MINHASH_COEFFICIENTS = [(_minhash_rng.randrange(1, MINHASH_PRIME), _minhash_rng.randrange(MINHASH_PRIME)) for _ in range(MINHASH_PERMUTATIONS)]
+
+@functools.lru_cache(maxsize=1 << 16)
+def _word_hashes(word: str) -> tuple:
+    h = zlib.crc32(word.encode("utf-8"))
+    return tuple((a * h + b) % MINHASH_PRIME for a, b in MINHASH_COEFFICIENTS)
+
+def _query_signature(query: str) -> array:
+    """
+    MinHash signature of a query's word shingles: for each hash function, the smallest
+    hashed word. Two signatures agree in about Jaccard(words1, words2) of their positions.
+    """
+    words = set(re.findall(r"\w+", query.lower())) or {query}
+    return array("I", map(min, zip(*map(_word_hashes, words))))
+
+class QueryClusterStore:
+    """
+    Persistent topic assignments of search queries, kept per site next to the response cache.
+
+    Queries are clustered with MinHash signatures and LSH banding: a query is only compared
+    with the cluster leaders sharing a band of its signature, instead of with every other query.
+    It joins the cluster of the most similar leader, or leads a new cluster named after itself,
+    so queries seen for the first time are assigned without reclustering the ones stored earlier.
+    """
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = _connect_shared_db(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS query_clusters (
+                site_url TEXT NOT NULL,
+                query TEXT NOT NULL,
+                cluster TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                PRIMARY KEY (site_url, query)
+            )
+            """
+        )
+
+    def assign(self, site_url: str, queries: Iterable[str]) -> Dict[str, str]:
+        """
+        Returns the cluster of every query, assigning and storing the ones not seen before.
+        Queries should come most important first: the first query of a new cluster names it.
+        """
+        rows_per_band = MINHASH_PERMUTATIONS // LSH_BANDS
+        clusters: Dict[str, str] = {}
+        signatures: Dict[str, array] = {}
+        buckets: Dict[tuple, List[str]] = {}
+
+        def index(query, signature):
+            signatures[query] = signature
+            for band in range(LSH_BANDS):
+                bucket = buckets.setdefault((band, *signature[band * rows_per_band:(band + 1) * rows_per_band]), [])
+                if len(bucket) < LSH_BUCKET_SIZE:
+                    bucket.append(query)
+
+        with self._lock:
+            stored = self._conn.execute(
+                "SELECT query, cluster, signature FROM query_clusters WHERE site_url = ?", (site_url,)
+            ).fetchall()
+        for query, cluster, blob in stored:
+            clusters[query] = cluster
+            if cluster == query:
+                signature = array("I")
+                signature.frombytes(blob)
+                index(query, signature)
+
+        new_rows = []
+        for query in queries:
+            if query in clusters:
+                continue
+            signature = _query_signature(query)
+            shared_bands = collections.Counter(itertools.chain.from_iterable(
+                buckets.get((band, *signature[band * rows_per_band:(band + 1) * rows_per_band]), ()) for band in range(LSH_BANDS)
+            ))
+
+            # The leaders sharing the most bands are the likeliest matches; confirm on the full signature
+            cluster, best = query, QUERY_CLUSTER_SIMILARITY
+            for candidate, _ in shared_bands.most_common(LSH_VERIFY_CANDIDATES):
+                similarity = sum(map(int.__eq__, signature, signatures[candidate])) / MINHASH_PERMUTATIONS
+                if similarity >= best:
+                    cluster, best = clusters[candidate], similarity
+            clusters[query] = cluster
+            if cluster == query:
+                index(query, signature)
+            new_rows.append((site_url, query, cluster, signature.tobytes()))
+
+        if new_rows:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO query_clusters (site_url, query, cluster, signature) VALUES (?, ?, ?, ?)", new_rows
+                )
+        return clusters
+
+_query_cluster_store: Optional[QueryClusterStore] = None
+
+def get_query_cluster_store() -> QueryClusterStore:
+    """
+    Returns the process-wide query cluster store, opening it on first use.
+    """
+    global _query_cluster_store
+    if _query_cluster_store is None:
+        _query_cluster_store = QueryClusterStore()
+    return _query_cluster_store
+
+def _new_issues_summary() -> Dict[str, List[str]]:
+    """
+    Returns an empty issues summary for an indexing issues report.
+    """
+    return {
+        "not_indexed": [],
+        "canonical_issues": [],
+        "robots_blocked": [],
+        "fetch_issues": [],
+        "indexed": []
+    }
+
+def _is_indexed(index_status: Dict[str, Any]) -> bool:
+    """
+    Returns True if an indexStatusResult says the URL is on Google.
+    """
+    verdict = index_status.get("verdict", "UNKNOWN")
+    coverage = index_status.get("coverageState", "Unknown").lower()
+    return verdict == "PASS" and "not indexed" not in coverage and "excluded" not in coverage
+
+def _record_indexing_issues(issues_summary: Dict[str, List[str]], page_url: str, response: Optional[Dict[str, Any]]) -> None:
+    """
+    Sorts the inspection response for a single URL into the issue categories of issues_summary.
+    """
+    if not response or "inspectionResult" not in response:
+        issues_summary["not_indexed"].append(f"{page_url} - No inspection data found")
+        return
+
+    inspection = response["inspectionResult"]
+    index_status = inspection.get("indexStatusResult", {})
+
+    # Check indexing status
+    coverage = index_status.get("coverageState", "Unknown")
+
+    if not _is_indexed(index_status):
+        issues_summary["not_indexed"].append(f"{page_url} - {coverage}")
+    else:
+        issues_summary["indexed"].append(page_url)
+
+    # Check canonical issues
+    google_canonical = index_status.get("googleCanonical", "")
+    user_canonical = index_status.get("userCanonical", "")
+
+    if google_canonical and user_canonical and google_canonical != user_canonical:
+        issues_summary["canonical_issues"].append(
+            f"{page_url} - Google chose: {google_canonical} instead of user-declared: {user_canonical}"
+        )
+
+    # Check robots.txt status
+    robots_state = index_status.get("robotsTxtState", "")
+    if robots_state == "BLOCKED":
+        issues_summary["robots_blocked"].append(page_url)
+
+    # Check fetch issues
+    fetch_state = index_status.get("pageFetchState", "")
+    if fetch_state != "SUCCESSFUL":
+        issues_summary["fetch_issues"].append(f"{page_url} - {fetch_state}")
+
+def _deadline_note(deadline: Deadline, skipped: List[str]) -> str:
+    """
+    Explains which URLs were left out because a tool ran out of time.
+    """
+    return f"Time budget of {deadline.seconds:g}s reached; {len(skipped)} URLs not inspected: {', '.join(skipped)}"
+
+def _summarize_issues(issues_summary: Dict[str, List[str]]) -> str:
+    """
+    One-line summary of an issues summary, used for partial results.
+    """
+    return ", ".join(f"{len(items)} {category.replace('_', ' ')}" for category, items in issues_summary.items())
+
+def _format_indexing_report(site_url: str, total_checked: int, issues_summary: Dict[str, List[str]]) -> List[str]:
+    """
+    Formats an issues summary into the lines of an indexing issues report.
+    """
+    result_lines = [f"Indexing Issues Report for {site_url}:"]
+    result_lines.append("-" * 80)
+
+    # Summary counts
+    result_lines.append(f"Total URLs checked: {total_checked}")
+    result_lines.append(f"Indexed: {len(issues_summary['indexed'])}")
+    result_lines.append(f"Not indexed: {len(issues_summary['not_indexed'])}")
+    result_lines.append(f"Canonical issues: {len(issues_summary['canonical_issues'])}")
+    result_lines.append(f"Robots.txt blocked: {len(issues_summary['robots_blocked'])}")
+    result_lines.append(f"Fetch issues: {len(issues_summary['fetch_issues'])}")
+    result_lines.append("-" * 80)
+
+    # Detailed issues
+    if issues_summary["not_indexed"]:
+        result_lines.append("\nNot Indexed URLs:")
+        for issue in issues_summary["not_indexed"]:
+            result_lines.append(f"- {issue}")
+
+    if issues_summary["canonical_issues"]:
+        result_lines.append("\nCanonical Issues:")
+        for issue in issues_summary["canonical_issues"]:
+            result_lines.append(f"- {issue}")
+
+    if issues_summary["robots_blocked"]:
+        result_lines.append("\nRobots.txt Blocked URLs:")
+        for url in issues_summary["robots_blocked"]:
+            result_lines.append(f"- {url}")
+
+    if issues_summary["fetch_issues"]:
+        result_lines.append("\nFetch Issues:")
+        for issue in issues_summary["fetch_issues"]:
+            result_lines.append(f"- {issue}")
+
+    return result_lines
+
+def _url_stratum(page_url: str, stratify_by: str, depth: int) -> str:
+    """
+    Returns the sampling stratum of a URL: the first `depth` directories of its path
+    ("prefix"), or the shape of its path with id-like segments masked ("template").
+    """
+    path = urllib.parse.urlsplit(page_url).path
+    if stratify_by == "template":
+        segments = [seg for seg in path.split("/") if seg]
+        shape = [
+            "{id}" if ID_SEGMENT_PATTERN.search(seg) else (seg if i < depth else "*")
+            for i, seg in enumerate(segments)
+        ]
+        return "/" + "/".join(shape)
+
+    directories = [seg for seg in path.rsplit("/", 1)[0].split("/") if seg]
+    return "/" + "".join(f"{seg}/" for seg in directories[:depth])
+
+class _StratifiedReservoir:
+    """
+    Keeps a uniform random sample of up to `capacity` entries per stratum of a stream
+    (reservoir sampling), along with the number of entries seen in each stratum.
+    """
+
+    def __init__(self, capacity: int, rng: random.Random, max_strata: int = MAX_SAMPLE_STRATA):
+        self.capacity = capacity
+        self.rng = rng
+        self.max_strata = max_strata
+        self.seen: Dict[str, int] = {}
+        self.samples: Dict[str, List[SitemapEntry]] = {}
+
+    def add(self, stratum: str, entry: SitemapEntry) -> None:
+        if stratum not in self.seen and len(self.seen) >= self.max_strata:
+            stratum = "(other)"
+        seen = self.seen[stratum] = self.seen.get(stratum, 0) + 1
+        sample = self.samples.setdefault(stratum, [])
+        if len(sample) < self.capacity:
+            sample.append(entry)
+        else:
+            slot = self.rng.randrange(seen)
+            if slot < self.capacity:
+                sample[slot] = entry
+
+def _allocate_sample(sizes: Dict[str, int], budget: int) -> Dict[str, int]:
+    """
+    Splits an inspection budget across strata proportionally to their size, giving every
+    stratum at least one URL while the budget allows (largest strata first).
+    """
+    if sum(sizes.values()) <= budget:
+        return dict(sizes)
+
+    total = sum(sizes.values())
+    order = sorted(sizes, key=lambda k: sizes[k], reverse=True)
+    allocation = {stratum: 0 for stratum in sizes}
+    for stratum in order[:budget]:
+        allocation[stratum] = 1
+
+    remaining = budget - sum(allocation.values())
+    shares = {stratum: remaining * sizes[stratum] / total for stratum in order}
+    for stratum in order:
+        allocation[stratum] += min(int(shares[stratum]), sizes[stratum] - allocation[stratum])
+
+    # Hand out what rounding left over, largest fractional share first
+    leftover = budget - sum(allocation.values())
+    by_remainder = sorted(order, key=lambda k: shares[k] - int(shares[k]), reverse=True)
+    while leftover > 0:
+        for stratum in by_remainder:
+            if leftover > 0 and allocation[stratum] < sizes[stratum]:
+                allocation[stratum] += 1
+                leftover -= 1
+    return allocation
+
+def _proportion_interval(successes: int, n: int, population: int, z: float) -> tuple:
+    """
+    Wilson score interval for a sampled proportion, with finite population correction.
+    """
+    if n == 0:
+        return (0.0, 1.0)
+    p = successes / n
+    if n >= population:
+        return (p, p)
+
+    # Sampling without replacement carries less variance than the binomial assumes
+    n_eff = n * (population - 1) / (population - n)
+    denominator = 1 + z * z / n_eff
+    centre = (p + z * z / (2 * n_eff)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / n_eff + z * z / (4 * n_eff * n_eff)) / denominator
+    return (max(0.0, centre - half_width), min(1.0, centre + half_width))
+
+class DimensionVocabulary:
+    """
+    Interns dimension values (queries, pages, countries...) to integer codes, one table per
+    dimension. Row sets that share a vocabulary can be joined on codes instead of strings.
+    """
+
+    def __init__(self, dimensions: List[str]):
+        self.dimensions = list(dimensions)
+        self.values: List[List[str]] = [[] for _ in self.dimensions]
+        self._codes: List[Dict[str, int]] = [{} for _ in self.dimensions]
+
+    def code(self, dimension_index: int, value: str) -> int:
+        codes = self._codes[dimension_index]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            self.values[dimension_index].append(value)
+        return code
+
+class AnalyticsRows:
+    """
+    Compact column store for Search Analytics rows.
+
+    Instead of one dict with a keys list per row, dimension values are kept as interned codes
+    and clicks, impressions, ctr and position as typed arrays, so a 250k row pull costs a few
+    dozen bytes per row. Sorting, aggregation and joins work directly on the arrays.
+    """
+
+    def __init__(self, dimensions: List[str], vocabulary: Optional[DimensionVocabulary] = None):
+        self.dimensions = list(dimensions)
+        self.vocabulary = vocabulary or DimensionVocabulary(self.dimensions)
+        self.codes = [array("I") for _ in self.dimensions]
+        self.clicks = array("d")
+        self.impressions = array("d")
+        self.ctr = array("d")
+        self.position = array("d")
+        # Set when a pull stopped early (deadline) and more rows may exist
+        self.truncated = False
+
+    def __len__(self) -> int:
+        return len(self.clicks)
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Appends rows in the API's response format.
+        """
+        code = self.vocabulary.code
+        for row in rows:
+            keys = row.get("keys", [])
+            for d, column in enumerate(self.codes):
+                column.append(code(d, keys[d] if d < len(keys) else ""))
+            self.clicks.append(row.get("clicks", 0))
+            self.impressions.append(row.get("impressions", 0))
+            self.ctr.append(row.get("ctr", 0))
+            self.position.append(row.get("position", 0))
+
+    def key(self, i: int) -> tuple:
+        """
+        Returns the dimension values of row i.
+        """
+        return tuple(self.vocabulary.values[d][column[i]] for d, column in enumerate(self.codes))
+
+    def key_codes(self, i: int) -> tuple:
+        return tuple(column[i] for column in self.codes)
+
+    def top(self, metric: str, limit: Optional[int] = None, descending: bool = True) -> List[int]:
+        """
+        Returns row indices ordered by a metric, optionally only the first `limit`.
+        """
+        values = getattr(self, metric)
+        if limit is not None and limit < len(values):
+            select = heapq.nlargest if descending else heapq.nsmallest
+            return select(limit, range(len(values)), key=values.__getitem__)
+        return sorted(range(len(values)), key=values.__getitem__, reverse=descending)
+
+    def outer_join(self, other: "AnalyticsRows") -> tuple:
+        """
+        Full outer join on the dimension key with a row set sharing this vocabulary.
+        Returns two parallel arrays of row indices into self and other, -1 where a key is missing.
+        """
+        index = {self.key_codes(i): i for i in range(len(self))}
+        left = array("l")
+        right = array("l")
+        for j in range(len(other)):
+            left.append(index.pop(other.key_codes(j), -1))
+            right.append(j)
+        for i in index.values():
+            left.append(i)
+            right.append(-1)
+        return left, right
+
+    def group_by(self, dimension_index: int) -> tuple:
+        """
+        Groups rows on one dimension with a counting sort over its codes, in O(rows) time and
+        4 bytes per row. Returns (offsets, order): the rows with code c are
+        order[offsets[c]:offsets[c + 1]], in their original order.
+        """
+        column = self.codes[dimension_index]
+        offsets = array("L", [0]) * (len(self.vocabulary.values[dimension_index]) + 1)
+        for c in column:
+            offsets[c + 1] += 1
+        for c in range(1, len(offsets)):
+            offsets[c] += offsets[c - 1]
+
+        cursor = offsets[:-1]
+        order = array("L", [0]) * len(column)
+        for i, c in enumerate(column):
+            order[cursor[c]] = i
+            cursor[c] += 1
+        return offsets, order
+
+async def _query_analytics_rows(
+    service,
+    site_url: str,
+    request: Dict[str, Any],
+    max_rows: int,
+    vocabulary: Optional[DimensionVocabulary] = None,
+    progress: Optional[ToolProgress] = None,
+    deadline: Optional[Deadline] = None
+) -> AnalyticsRows:
+    """
+    Runs a Search Analytics query, paging through results until max_rows rows are read
+    or the API runs out of data, and returns them as an AnalyticsRows. Each page fetched
+    advances progress by one.
+
+    If the deadline passes, the rows read so far are returned with `truncated` set.
+    """
+    rows = AnalyticsRows(request.get("dimensions", []), vocabulary)
+    start_row = request.get("startRow", 0)
+
+    while len(rows) < max_rows:
+        page_size = min(ANALYTICS_PAGE_SIZE, max_rows - len(rows))
+        page_request = dict(request, startRow=start_row + len(rows), rowLimit=page_size)
+        query = service.searchanalytics().query(siteUrl=site_url, body=page_request)
+        execute = functools.partial(_cached_execute, "analytics", query, site_url, page_request)
+        if deadline is None:
+            response = await asyncio.to_thread(execute)
+        else:
+            try:
+                response = await deadline.run(execute)
+            except DeadlineExceeded:
+                # A page still in flight is stored in the response cache by _cached_execute when it arrives
+                rows.truncated = True
+                break
+
+        page = response.get("rows", [])
+        rows.extend(page)
+        if progress is not None:
+            await progress.advance()
+        if len(page) < page_size:
+            break
+
+    return rows
+
+def _format_analytics_rows(rows: AnalyticsRows) -> List[str]:
+    """
+    Formats analytics rows as "dimension values | Clicks | Impressions | CTR | Position" lines.
+    """
+    values = rows.vocabulary.values
+    lines = []
+    for i in range(len(rows)):
+        data = [values[d][column[i]][:100] for d, column in enumerate(rows.codes)]  # Truncate long dimension values to 100 characters
+        data.append(f"{rows.clicks[i]:.0f}")
+        data.append(f"{rows.impressions[i]:.0f}")
+        data.append(f"{rows.ctr[i] * 100:.2f}%")
+        data.append(f"{rows.position[i]:.1f}")
+        lines.append(" | ".join(data))
+    return lines
+
+def _performance_overview_requests(days: int) -> tuple:
+    """
+    Builds the totals and by-date requests of a performance overview over the last `days` days.
+    """
+    # Calculate date range
+    end_date = datetime.now().date()
+    start_date = end_date - timedelta(days=days)
+
+    total_request = {
+        "startDate": start_date.strftime("%Y-%m-%d"),
+        "endDate": end_date.strftime("%Y-%m-%d"),
+        "dimensions": [],  # No dimensions for totals
+        "rowLimit": 1
+    }
+    date_request = {
+        "startDate": start_date.strftime("%Y-%m-%d"),
+        "endDate": end_date.strftime("%Y-%m-%d"),
+        "dimensions": ["date"],
+        "rowLimit": days
+    }
+    return total_request, date_request
+
+def _has_stored_credentials() -> bool:
+    """
+    Returns True if the server can authenticate without opening a browser: the stored OAuth
+    token is valid or refreshable, or OAuth will not be attempted and a service account file exists.
+    """
+    if not SKIP_OAUTH:
+        try:
+            creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
+            if creds.valid or (creds.expired and creds.refresh_token):
+                return True
+        except Exception:
+            pass  # Missing or unreadable token
+        if os.path.exists(OAUTH_CLIENT_SECRETS_FILE):
+            return False  # Authenticating would start the consent flow
+    return any(path and os.path.exists(path) for path in POSSIBLE_CREDENTIAL_PATHS)
+
+def warm_up_cache() -> None:
+    """
+    Prefetches the property list, each property's sitemaps and its recent top-line metrics
+    into the response cache, so the first questions of a session are answered from memory.
+
+    Meant to run in a background thread: it lowers its own scheduling priority where the
+    OS allows it and pauses between calls so interactive tool calls are served first.
+    """
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (AttributeError, OSError):
+        pass  # Per-thread priorities are only supported on Linux
+
+    try:
+        service = get_gsc_service(interactive=False)
+        sites = _cached_execute("sites", service.sites().list()).get("siteEntry", [])
+    except Exception as e:
+        print(f"Warm-up skipped: {str(e)}", file=sys.stderr)
+        return
+
+    for site in sites:
+        site_url = site.get("siteUrl")
+        try:
+            time.sleep(WARMUP_PAUSE_SECONDS)
+            _cached_execute("sitemaps", service.sitemaps().list(siteUrl=site_url), site_url)
+            for request in _performance_overview_requests(WARMUP_DAYS):
+                time.sleep(WARMUP_PAUSE_SECONDS)
+                _cached_execute("analytics", service.searchanalytics().query(siteUrl=site_url, body=request), site_url, request)
+        except Exception as e:
+            # Missing permissions on one property shouldn't stop the rest
+            print(f"Warm-up failed for {site_url}: {str(e)}", file=sys.stderr)
 
 @mcp.tool()
 async def list_properties() -> str:
@@ -132,7 +1529,7 @@ async def list_properties() -> str:
     """
     try:
         service = get_gsc_service()
-        site_list = service.sites().list().execute()
+        site_list = await asyncio.to_thread(_cached_execute, "sites", service.sites().list())
 
         # site_list is typically something like:
         # {
@@ -179,6 +1576,7 @@ async def add_site(site_url: str) -> str:
         
         # Add the site
         response = service.sites().add(siteUrl=site_url).execute()
+        get_response_cache().invalidate("sites|")
         
         # Format the response
         result_lines = [f"Site {site_url} has been added to Search Console."]
@@ -235,6 +1633,7 @@ async def delete_site(site_url: str) -> str:
         
         # Delete the site
         service.sites().delete(siteUrl=site_url).execute()
+        get_response_cache().invalidate("sites|")
         
         return f"Site {site_url} has been removed from Search Console."
     except HttpError as e:
@@ -301,9 +1700,9 @@ async def get_search_analytics(site_url: str, days: int = 28, dimensions: str =
         }
         
         # Execute request
-        response = service.searchanalytics().query(siteUrl=site_url, body=request).execute()
+        rows = await _query_analytics_rows(service, site_url, request, max_rows=request["rowLimit"])
         
-        if not response.get("rows"):
+        if not rows:
             return f"No search analytics data found for {site_url} in the last {days} days."
         
         # Format results
@@ -319,19 +1718,7 @@ async def get_search_analytics(site_url: str, days: int = 28, dimensions: str =
         result_lines.append("-" * 80)
         
         # Add data rows
-        for row in response.get("rows", []):
-            data = []
-            # Add dimension values
-            for dim_value in row.get("keys", []):
-                data.append(dim_value[:100])  # Increased truncation limit to 100 characters
-            
-            # Add metrics
-            data.append(str(row.get("clicks", 0)))
-            data.append(str(row.get("impressions", 0)))
-            data.append(f"{row.get('ctr', 0) * 100:.2f}%")
-            data.append(f"{row.get('position', 0):.1f}")
-            
-            result_lines.append(" | ".join(data))
+        result_lines.extend(_format_analytics_rows(rows))
         
         return "\n".join(result_lines)
     except Exception as e:
@@ -394,7 +1781,7 @@ async def get_sitemaps(site_url: str) -> str:
         service = get_gsc_service()
         
         # Get sitemaps list
-        sitemaps = service.sitemaps().list(siteUrl=site_url).execute()
+        sitemaps = await asyncio.to_thread(_cached_execute, "sitemaps", service.sitemaps().list(siteUrl=site_url), site_url)
         
         if not sitemaps.get("sitemap"):
             return f"No sitemaps found for {site_url}."
@@ -453,16 +1840,10 @@ async def inspect_url_enhanced(site_url: str, page_url: str) -> str:
         page_url: The specific URL to inspect
     """
     try:
-        service = get_gsc_service()
-        
-        # Build request
-        request = {
-            "inspectionUrl": page_url,
-            "siteUrl": site_url
-        }
+        service = await asyncio.to_thread(get_gsc_service)
         
-        # Execute request
-        response = service.urlInspection().index().inspect(body=request).execute()
+        # Execute request (off the event loop: it may wait on another process's cache lease)
+        response = await asyncio.to_thread(_inspect_url, service, site_url, page_url, INSPECTION_FIELDS_ENHANCED)
         
         if not response or "inspectionResult" not in response:
             return f"No inspection data found for {page_url}."
@@ -562,13 +1943,15 @@ async def inspect_url_enhanced(site_url: str, page_url: str) -> str:
         return f"Error inspecting URL: {str(e)}"
 
 @mcp.tool()
-async def batch_url_inspection(site_url: str, urls: str) -> str:
+@deduplicate_calls
+async def batch_url_inspection(site_url: str, urls: str, deadline_seconds: float = None, ctx: Context = None) -> str:
     """
     Inspect multiple URLs in batch (within API limits).
     
     Args:
         site_url: The URL of the site in Search Console (must be exact match, for domain properties use format: sc-domain:example.com)
         urls: List of URLs to inspect, one per line
+        deadline_seconds: Time budget in seconds; whatever was done when it runs out is returned (default: GSC_TOOL_DEADLINE_SECONDS, 120)
     """
     try:
         service = get_gsc_service()
@@ -584,17 +1967,17 @@ async def batch_url_inspection(site_url: str, urls: str) -> str:
         
         # Process each URL
         results = []
+        progress = ToolProgress(ctx, total=len(url_list), unit="URLs inspected")
+        deadline = Deadline.for_tool("batch_url_inspection", deadline_seconds)
         
-        for page_url in url_list:
-            # Build request
-            request = {
-                "inspectionUrl": page_url,
-                "siteUrl": site_url
-            }
+        for i, page_url in enumerate(url_list):
+            if deadline.expired:
+                results.append(_deadline_note(deadline, url_list[i:]))
+                break
             
             try:
-                # Execute request with a small delay to avoid rate limits
-                response = service.urlInspection().index().inspect(body=request).execute()
+                # Execute request
+                response = await deadline.run(_inspect_url, service, site_url, page_url, INSPECTION_FIELDS_BATCH)
                 
                 if not response or "inspectionResult" not in response:
                     results.append(f"{page_url}: No inspection data found")
@@ -626,8 +2009,15 @@ async def batch_url_inspection(site_url: str, urls: str) -> str:
                 # Format result
                 results.append(f"{page_url}:\n  Status: {verdict} - {coverage}\n  Last Crawl: {last_crawl}\n  Rich Results: {rich_results}\n")
             
+            except DeadlineExceeded:
+                results.append(_deadline_note(deadline, url_list[i:]))
+                break
+            
             except Exception as e:
                 results.append(f"{page_url}: Error - {str(e)}")
+            
+            finally:
+                await progress.advance()
         
         # Combine results
         return f"Batch URL Inspection Results for {site_url}:\n\n" + "\n".join(results)
@@ -636,13 +2026,15 @@ async def batch_url_inspection(site_url: str, urls: str) -> str:
         return f"Error performing batch inspection: {str(e)}"
 
 @mcp.tool()
-async def check_indexing_issues(site_url: str, urls: str) -> str:
+@deduplicate_calls
+async def check_indexing_issues(site_url: str, urls: str, deadline_seconds: float = None, ctx: Context = None) -> str:
     """
     Check for specific indexing issues across multiple URLs.
     
     Args:
         site_url: The URL of the site in Search Console (must be exact match, for domain properties use format: sc-domain:example.com)
         urls: List of URLs to check, one per line
+        deadline_seconds: Time budget in seconds; whatever was done when it runs out is returned (default: GSC_TOOL_DEADLINE_SECONDS, 120)
     """
     try:
         service = get_gsc_service()
@@ -656,139 +2048,393 @@ async def check_indexing_issues(site_url: str, urls: str) -> str:
         if len(url_list) > 10:
             return f"Too many URLs provided ({len(url_list)}). Please limit to 10 URLs per batch to avoid API quota issues."
         
-        # Track issues by category
-        issues_summary = {
-            "not_indexed": [],
-            "canonical_issues": [],
-            "robots_blocked": [],
-            "fetch_issues": [],
-            "indexed": []
-        }
+        # Track issues by category
+        issues_summary = _new_issues_summary()
+        progress = ToolProgress(ctx, total=len(url_list), unit="URLs inspected", describe=lambda: _summarize_issues(issues_summary))
+        
+        deadline = Deadline.for_tool("check_indexing_issues", deadline_seconds)
+        skipped = []
+        
+        # Process each URL
+        for i, page_url in enumerate(url_list):
+            try:
+                if deadline.expired:
+                    raise DeadlineExceeded
+                
+                # Execute request
+                response = await deadline.run(_inspect_url, service, site_url, page_url)
+                _record_indexing_issues(issues_summary, page_url, response)
+            
+            except DeadlineExceeded:
+                skipped = url_list[i:]
+                break
+            
+            except Exception as e:
+                issues_summary["not_indexed"].append(f"{page_url} - Error: {str(e)}")
+            
+            await progress.advance()
+        
+        # Format results
+        result_lines = _format_indexing_report(site_url, len(url_list) - len(skipped), issues_summary)
+        if skipped:
+            result_lines.append(f"\nNote: {_deadline_note(deadline, skipped)}")
+        
+        return "\n".join(result_lines)
+    
+    except Exception as e:
+        return f"Error checking indexing issues: {str(e)}"
+
+@mcp.tool()
+@deduplicate_calls
+async def inspect_sitemap_urls(
+    site_url: str,
+    sitemap: str,
+    max_urls: int = 100,
+    concurrency: int = 4,
+    incremental: bool = False,
+    max_age_days: int = 30,
+    deadline_seconds: float = None,
+    ctx: Context = None
+) -> str:
+    """
+    Check every URL listed in a sitemap for indexing issues.
+    
+    The sitemap is streamed rather than loaded, so very large sitemaps (50k URLs) and sitemap
+    indexes are handled in constant memory. URLs are inspected in parallel as they are read,
+    and every result is kept in a local inspection ledger.
+    
+    Args:
+        site_url: The URL of the site in Search Console (must be exact match, for domain properties use format: sc-domain:example.com)
+        sitemap: Path to a local sitemap file (e.g. public/sitemap.xml) or the URL of a sitemap. Gzipped sitemaps and sitemap indexes are followed.
+        max_urls: Maximum number of URLs to inspect (default: 100, max 2000 - the daily URL Inspection quota per property)
+        concurrency: Number of URLs to inspect in parallel (default: 4, max 10)
+        incremental: Only inspect URLs that are new, changed since their last inspection (per sitemap lastmod) or previously failing; answer the rest from the ledger (default: False)
+        max_age_days: In incremental mode, re-inspect URLs whose last inspection is older than this many days (default: 30)
+        deadline_seconds: Time budget in seconds; whatever was done when it runs out is returned (default: GSC_TOOL_DEADLINE_SECONDS, 120)
+    """
+    try:
+        max_urls = max(1, min(max_urls, MAX_INSPECTIONS_PER_RUN))
+        concurrency = max(1, min(concurrency, MAX_INSPECTION_CONCURRENCY))
+        ledger = get_inspection_ledger()
+        
+        issues_summary = _new_issues_summary()
+        checked = 0
+        
+        # Filled by the sitemap reader thread, merged into the report at the end
+        ledger_summary = _new_issues_summary()
+        from_ledger = 0
+        
+        def changed_entries():
+            nonlocal from_ledger
+            for entry in iter_sitemap_urls(sitemap):
+                record = ledger.get(site_url, entry.loc)
+                if ledger.needs_inspection(record, entry, max_age_days):
+                    yield entry
+                else:
+                    from_ledger += 1
+                    _record_indexing_issues(ledger_summary, entry.loc, record["response"])
+        
+        def on_result(entry, response, error):
+            nonlocal checked
+            checked += 1
+            if error is not None:
+                issues_summary["not_indexed"].append(f"{entry.loc} - Error: {str(error)}")
+            else:
+                ledger.record(site_url, entry, response)
+                _record_indexing_issues(issues_summary, entry.loc, response)
+        
+        entries = changed_entries() if incremental else iter_sitemap_urls(sitemap)
+        progress = ToolProgress(ctx, total=max_urls, unit="URLs inspected", describe=lambda: _summarize_issues(issues_summary))
+        deadline = Deadline.for_tool("inspect_sitemap_urls", deadline_seconds)
+        completed = await _inspect_concurrently(
+            site_url, itertools.islice(entries, max_urls), on_result, concurrency, progress, deadline,
+            on_late=lambda entry, response: ledger.record(site_url, entry, response)
+        )
+        
+        if checked == 0 and from_ledger == 0:
+            return f"No URLs found in sitemap {sitemap}."
+        
+        for category, items in ledger_summary.items():
+            issues_summary[category].extend(items)
+        
+        result_lines = _format_indexing_report(site_url, checked + from_ledger, issues_summary)
+        result_lines.insert(1, f"Sitemap: {sitemap}")
+        if incremental:
+            result_lines.insert(2, f"Inspected now: {checked} | Unchanged, answered from ledger: {from_ledger}")
+        
+        if not completed:
+            result_lines.append(f"\nNote: Time budget of {deadline.seconds:g}s reached after {checked} inspections. Remaining sitemap URLs were not checked.")
+        elif checked == max_urls:
+            result_lines.append(f"\nNote: Stopped after {max_urls} inspections (max_urls). Any remaining sitemap URLs were not checked.")
+        
+        return "\n".join(result_lines)
+    
+    except FileNotFoundError as e:
+        return f"Sitemap not found: {sitemap}"
+    except Exception as e:
+        return f"Error inspecting sitemap URLs: {str(e)}"
+
+@mcp.tool()
+@deduplicate_calls
+async def sample_index_coverage(
+    site_url: str,
+    sitemap: str = None,
+    urls: str = None,
+    budget: int = 100,
+    stratify_by: str = "prefix",
+    depth: int = 1,
+    confidence: float = 0.95,
+    seed: int = None,
+    concurrency: int = 4,
+    deadline_seconds: float = None,
+    ctx: Context = None
+) -> str:
+    """
+    Estimate how much of a site is indexed by inspecting a stratified random sample of its URLs.
+    
+    URLs are grouped into strata by path prefix or URL template, a fixed budget of inspections is
+    split across the strata, and indexed/not-indexed ratios are reported with confidence intervals.
+    
+    Args:
+        site_url: The URL of the site in Search Console (must be exact match, for domain properties use format: sc-domain:example.com)
+        sitemap: Path to a local sitemap file or the URL of a sitemap to sample from
+        urls: Alternatively, the list of URLs to sample from, one per line
+        budget: Number of URL Inspection API calls to spend (default: 100, max 2000)
+        stratify_by: How to group URLs: "prefix" (first directories of the path) or "template" (path shape with ids masked) (default: prefix)
+        depth: Number of path segments that define a stratum (default: 1)
+        confidence: Confidence level of the reported intervals (default: 0.95)
+        seed: Optional random seed to make the sample reproducible
+        concurrency: Number of URLs to inspect in parallel (default: 4, max 10)
+        deadline_seconds: Time budget in seconds; whatever was done when it runs out is returned (default: GSC_TOOL_DEADLINE_SECONDS, 120)
+    """
+    try:
+        if not sitemap and not urls:
+            return "Please provide either a sitemap or a list of URLs to sample from."
+        
+        stratify_by = stratify_by.lower().strip()
+        if stratify_by not in ("prefix", "template"):
+            return f"Invalid stratify_by: {stratify_by}. Please use one of: prefix, template"
+        
+        if not 0 < confidence < 1:
+            return "Confidence must be between 0 and 1 (e.g. 0.95)."
+        
+        budget = max(1, min(budget, MAX_INSPECTIONS_PER_RUN))
+        concurrency = max(1, min(concurrency, MAX_INSPECTION_CONCURRENCY))
+        rng = random.Random(seed)
+        deadline = Deadline.for_tool("sample_index_coverage", deadline_seconds)
+        
+        if sitemap:
+            source = iter_sitemap_urls(sitemap)
+        else:
+            source = (SitemapEntry(url.strip()) for url in urls.split('\n') if url.strip())
+        
+        # Single streaming pass: count each stratum and keep a bounded random sample of it
+        reservoir = _StratifiedReservoir(budget, rng)
+        
+        def fill():
+            for entry in source:
+                if deadline.expired:
+                    break
+                reservoir.add(_url_stratum(entry.loc, stratify_by, depth), entry)
+        
+        await asyncio.to_thread(fill)
+        
+        if deadline.expired:
+            return f"Time budget of {deadline.seconds:g}s ran out while reading the URLs to sample from. Please raise deadline_seconds."
+        
+        if not reservoir.seen:
+            return f"No URLs found to sample from{f' in sitemap {sitemap}' if sitemap else ''}."
+        
+        allocation = _allocate_sample(reservoir.seen, budget)
+        strata = {
+            stratum: {"indexed": 0, "not_indexed": 0, "errors": 0}
+            for stratum, n in allocation.items() if n > 0
+        }
+        
+        # Answer from the inspection ledger where it has a fresh result, inspect the rest
+        ledger = get_inspection_ledger()
+        stratum_of = {}
+        to_inspect = []
+        
+        def count(stratum, response):
+            index_status = (response or {}).get("inspectionResult", {}).get("indexStatusResult", {})
+            strata[stratum]["indexed" if _is_indexed(index_status) else "not_indexed"] += 1
+        
+        for stratum in strata:
+            for entry in rng.sample(reservoir.samples[stratum], allocation[stratum]):
+                record = ledger.get(site_url, entry.loc)
+                if ledger.needs_inspection(record, entry, max_age_days=30):
+                    stratum_of[entry.loc] = stratum
+                    to_inspect.append(entry)
+                else:
+                    count(stratum, record["response"])
+        
+        def on_result(entry, response, error):
+            stratum = stratum_of[entry.loc]
+            if error is not None:
+                strata[stratum]["errors"] += 1
+            else:
+                ledger.record(site_url, entry, response)
+                count(stratum, response)
+        
+        progress = ToolProgress(
+            ctx,
+            total=len(to_inspect),
+            unit="sampled URLs inspected",
+            describe=lambda: f"{sum(c['indexed'] for c in strata.values())} indexed, {sum(c['not_indexed'] for c in strata.values())} not indexed"
+        )
+        completed = await _inspect_concurrently(
+            site_url, to_inspect, on_result, concurrency, progress, deadline,
+            on_late=lambda entry, response: ledger.record(site_url, entry, response)
+        )
+        
+        # Per-stratum and stratified overall estimates
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        covered_population = sum(reservoir.seen[stratum] for stratum in strata)
+        overall = 0.0
+        overall_variance = 0.0
+        
+        result_lines = [f"Index Coverage Sample for {site_url}:"]
+        result_lines.append(f"Source: {sitemap or 'URL list'} | Stratified by: {stratify_by} (depth {depth})")
+        result_lines.append(
+            f"Population: {sum(reservoir.seen.values()):,} URLs in {len(reservoir.seen)} strata | "
+            f"Sampled: {sum(allocation.values())} (API calls: {len(to_inspect)}, from ledger: {sum(allocation.values()) - len(to_inspect)})"
+        )
+        result_lines.append("-" * 100)
+        result_lines.append(f"Stratum | URLs | Sampled | Indexed | Not Indexed | Est. Indexed | {confidence:.0%} CI | Est. Not Indexed URLs")
+        result_lines.append("-" * 100)
         
-        # Process each URL
-        for page_url in url_list:
-            # Build request
-            request = {
-                "inspectionUrl": page_url,
-                "siteUrl": site_url
-            }
+        for stratum, counts in sorted(strata.items(), key=lambda item: reservoir.seen[item[0]], reverse=True):
+            population = reservoir.seen[stratum]
+            n = counts["indexed"] + counts["not_indexed"]
+            if n == 0:
+                result_lines.append(f"{stratum[:100]} | {population:,} | 0 | - | - | - | - | -")
+                continue
             
-            try:
-                # Execute request
-                response = service.urlInspection().index().inspect(body=request).execute()
-                
-                if not response or "inspectionResult" not in response:
-                    issues_summary["not_indexed"].append(f"{page_url} - No inspection data found")
-                    continue
-                
-                inspection = response["inspectionResult"]
-                index_status = inspection.get("indexStatusResult", {})
-                
-                # Check indexing status
-                verdict = index_status.get("verdict", "UNKNOWN")
-                coverage = index_status.get("coverageState", "Unknown")
-                
-                if verdict != "PASS" or "not indexed" in coverage.lower() or "excluded" in coverage.lower():
-                    issues_summary["not_indexed"].append(f"{page_url} - {coverage}")
-                else:
-                    issues_summary["indexed"].append(page_url)
-                
-                # Check canonical issues
-                google_canonical = index_status.get("googleCanonical", "")
-                user_canonical = index_status.get("userCanonical", "")
-                
-                if google_canonical and user_canonical and google_canonical != user_canonical:
-                    issues_summary["canonical_issues"].append(
-                        f"{page_url} - Google chose: {google_canonical} instead of user-declared: {user_canonical}"
-                    )
-                
-                # Check robots.txt status
-                robots_state = index_status.get("robotsTxtState", "")
-                if robots_state == "BLOCKED":
-                    issues_summary["robots_blocked"].append(page_url)
-                
-                # Check fetch issues
-                fetch_state = index_status.get("pageFetchState", "")
-                if fetch_state != "SUCCESSFUL":
-                    issues_summary["fetch_issues"].append(f"{page_url} - {fetch_state}")
+            p = counts["indexed"] / n
+            low, high = _proportion_interval(counts["indexed"], n, population, z)
+            result_lines.append(
+                f"{stratum[:100]} | {population:,} | {n} | {counts['indexed']} | {counts['not_indexed']} | "
+                f"{p * 100:.1f}% | {low * 100:.1f}%-{high * 100:.1f}% | ~{round((1 - p) * population):,}"
+            )
             
-            except Exception as e:
-                issues_summary["not_indexed"].append(f"{page_url} - Error: {str(e)}")
-        
-        # Format results
-        result_lines = [f"Indexing Issues Report for {site_url}:"]
-        result_lines.append("-" * 80)
-        
-        # Summary counts
-        result_lines.append(f"Total URLs checked: {len(url_list)}")
-        result_lines.append(f"Indexed: {len(issues_summary['indexed'])}")
-        result_lines.append(f"Not indexed: {len(issues_summary['not_indexed'])}")
-        result_lines.append(f"Canonical issues: {len(issues_summary['canonical_issues'])}")
-        result_lines.append(f"Robots.txt blocked: {len(issues_summary['robots_blocked'])}")
-        result_lines.append(f"Fetch issues: {len(issues_summary['fetch_issues'])}")
-        result_lines.append("-" * 80)
+            weight = population / covered_population
+            overall += weight * p
+            # Agresti-Coull adjusted proportion: an all-indexed (or none-indexed) stratum sample
+            # still carries sampling variance, so the overall interval never collapses to a point
+            n_adjusted = n + z * z
+            p_adjusted = (counts["indexed"] + z * z / 2) / n_adjusted
+            overall_variance += weight ** 2 * max(0.0, 1 - n / population) * p_adjusted * (1 - p_adjusted) / n_adjusted
         
-        # Detailed issues
-        if issues_summary["not_indexed"]:
-            result_lines.append("\nNot Indexed URLs:")
-            for issue in issues_summary["not_indexed"]:
-                result_lines.append(f"- {issue}")
+        result_lines.append("-" * 100)
+        half_width = z * math.sqrt(overall_variance)
+        result_lines.append(
+            f"Overall: est. {overall * 100:.1f}% indexed ({confidence:.0%} CI {max(0.0, overall - half_width) * 100:.1f}%-"
+            f"{min(1.0, overall + half_width) * 100:.1f}%), ~{round((1 - overall) * covered_population):,} "
+            f"of {covered_population:,} URLs not indexed"
+        )
         
-        if issues_summary["canonical_issues"]:
-            result_lines.append("\nCanonical Issues:")
-            for issue in issues_summary["canonical_issues"]:
-                result_lines.append(f"- {issue}")
+        if not completed:
+            result_lines.append(f"Note: Time budget of {deadline.seconds:g}s reached; estimates only use the {progress.done:g} of {len(to_inspect)} sampled URLs inspected by then.")
         
-        if issues_summary["robots_blocked"]:
-            result_lines.append("\nRobots.txt Blocked URLs:")
-            for url in issues_summary["robots_blocked"]:
-                result_lines.append(f"- {url}")
+        errors = sum(counts["errors"] for counts in strata.values())
+        if errors:
+            result_lines.append(f"Note: {errors} inspections failed and were left out of the estimates.")
         
-        if issues_summary["fetch_issues"]:
-            result_lines.append("\nFetch Issues:")
-            for issue in issues_summary["fetch_issues"]:
-                result_lines.append(f"- {issue}")
+        unsampled = len(reservoir.seen) - len(strata)
+        if unsampled:
+            result_lines.append(f"Note: {unsampled} small strata got no share of the budget and are not covered by the estimate.")
         
         return "\n".join(result_lines)
     
+    except FileNotFoundError as e:
+        return f"Sitemap not found: {sitemap}"
     except Exception as e:
-        return f"Error checking indexing issues: {str(e)}"
+        return f"Error sampling index coverage: {str(e)}"
+
+def _lttb_indices(values: List[float], threshold: int) -> List[int]:
+    """
+    Largest-Triangle-Three-Buckets: picks `threshold` points of a series whose line chart
+    looks like the full one. The first and last points are kept and each bucket in between
+    contributes the point forming the largest triangle with its neighbours, so peaks and
+    dips survive where averaging would flatten them.
+    """
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    selected = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        # Average of the next bucket stands in for the following point
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        next_x = (end + next_end - 1) / 2 if next_end > end else n - 1
+        next_y = sum(values[end:next_end]) / (next_end - end) if next_end > end else values[-1]
+
+        a = max(
+            range(start, end),
+            key=lambda j: abs((a - next_x) * (values[j] - values[a]) - (a - j) * (next_y - values[a]))
+        )
+        selected.append(a)
+    selected.append(n - 1)
+    return selected
+
+def _aggregate_date_rows(rows: List[Dict[str, Any]], granularity: str) -> List[Dict[str, Any]]:
+    """
+    Sums daily rows (sorted by date) into weeks starting on Monday or calendar months.
+    CTR is recomputed from the sums and position is weighted by impressions.
+    """
+    periods: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        day = datetime.strptime(row["keys"][0], "%Y-%m-%d").date()
+        if granularity == "week":
+            label = (day - timedelta(days=day.weekday())).strftime("%Y-%m-%d")
+        else:
+            label = day.strftime("%Y-%m")
+        period = periods.setdefault(label, {"keys": [label], "clicks": 0, "impressions": 0, "weighted_position": 0.0})
+        period["clicks"] += row.get("clicks", 0)
+        period["impressions"] += row.get("impressions", 0)
+        period["weighted_position"] += row.get("position", 0) * row.get("impressions", 0)
+
+    for period in periods.values():
+        impressions = period["impressions"]
+        period["ctr"] = period["clicks"] / impressions if impressions else 0
+        period["position"] = period.pop("weighted_position") / impressions if impressions else 0
+    return list(periods.values())
 
 @mcp.tool()
-async def get_performance_overview(site_url: str, days: int = 28) -> str:
+async def get_performance_overview(
+    site_url: str,
+    days: int = 28,
+    granularity: str = "day",
+    points: int = 40
+) -> str:
     """
     Get a performance overview for a specific property.
     
     Args:
         site_url: The URL of the site in Search Console (must be exact match)
         days: Number of days to look back (default: 28)
+        granularity: Trend resolution: "day", "week", "month", or "sampled" for the `points` days
+            that best preserve the shape of the clicks curve, peaks and dips included (default: day)
+        points: Number of days shown with granularity "sampled" (default: 40)
     """
+    if granularity not in ("day", "week", "month", "sampled"):
+        return "Error: granularity must be 'day', 'week', 'month' or 'sampled'."
+    
     try:
         service = get_gsc_service()
         
-        # Calculate date range
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=days)
-        
-        # Get total metrics
-        total_request = {
-            "startDate": start_date.strftime("%Y-%m-%d"),
-            "endDate": end_date.strftime("%Y-%m-%d"),
-            "dimensions": [],  # No dimensions for totals
-            "rowLimit": 1
-        }
-        
-        total_response = service.searchanalytics().query(siteUrl=site_url, body=total_request).execute()
-        
-        # Get by date for trend
-        date_request = {
-            "startDate": start_date.strftime("%Y-%m-%d"),
-            "endDate": end_date.strftime("%Y-%m-%d"),
-            "dimensions": ["date"],
-            "rowLimit": days
-        }
-        
-        date_response = service.searchanalytics().query(siteUrl=site_url, body=date_request).execute()
+        # Get total metrics and daily trend
+        total_request, date_request = _performance_overview_requests(days)
+        total_response, date_response = await asyncio.gather(
+            asyncio.to_thread(_cached_execute, "analytics", service.searchanalytics().query(siteUrl=site_url, body=total_request), site_url, total_request),
+            asyncio.to_thread(_cached_execute, "analytics", service.searchanalytics().query(siteUrl=site_url, body=date_request), site_url, date_request)
+        )
         
         # Format results
         result_lines = [f"Performance Overview for {site_url} (last {days} days):"]
@@ -807,19 +2453,30 @@ async def get_performance_overview(site_url: str, days: int = 28) -> str:
         
         # Add trend data
         if date_response.get("rows"):
-            result_lines.append("\nDaily Trend:")
-            result_lines.append("Date | Clicks | Impressions | CTR | Position")
-            result_lines.append("-" * 80)
-            
             # Sort by date
             sorted_rows = sorted(date_response["rows"], key=lambda x: x["keys"][0])
             
+            # Downsample long series; totals above always come from the full period
+            if granularity in ("week", "month"):
+                sorted_rows = _aggregate_date_rows(sorted_rows, granularity)
+                result_lines.append(f"\n{granularity.capitalize()}ly Trend:")
+                result_lines.append(f"{granularity.capitalize()} | Clicks | Impressions | CTR | Position")
+            elif granularity == "sampled" and len(sorted_rows) > points:
+                selected = _lttb_indices([row.get("clicks", 0) for row in sorted_rows], points)
+                result_lines.append(f"\nDaily Trend ({len(selected)} of {len(sorted_rows)} days, selected to preserve peaks and dips):")
+                result_lines.append("Date | Clicks | Impressions | CTR | Position")
+                sorted_rows = [sorted_rows[i] for i in selected]
+            else:
+                result_lines.append("\nDaily Trend:")
+                result_lines.append("Date | Clicks | Impressions | CTR | Position")
+            result_lines.append("-" * 80)
+            
             for row in sorted_rows:
                 date_str = row["keys"][0]
-                # Format date from YYYY-MM-DD to MM/DD
+                # Format date from YYYY-MM-DD to MM/DD (or YYYY/MM/DD over a year)
                 try:
                     date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-                    date_formatted = date_obj.strftime("%m/%d")
+                    date_formatted = date_obj.strftime("%m/%d" if days <= 365 else "%Y/%m/%d")
                 except:
                     date_formatted = date_str
                 
@@ -915,9 +2572,9 @@ async def get_advanced_search_analytics(
             request["dimensionFilterGroups"] = [filter_group]
         
         # Execute request
-        response = service.searchanalytics().query(siteUrl=site_url, body=request).execute()
+        rows = await _query_analytics_rows(service, site_url, request, max_rows=request["rowLimit"])
         
-        if not response.get("rows"):
+        if not rows:
             return (f"No search analytics data found for {site_url} with the specified parameters.\n\n"
                    f"Parameters used:\n"
                    f"- Date range: {start_date} to {end_date}\n"
@@ -931,7 +2588,7 @@ async def get_advanced_search_analytics(
         result_lines.append(f"Search type: {search_type}")
         if filter_dimension:
             result_lines.append(f"Filter: {filter_dimension} {filter_operator} '{filter_expression}'")
-        result_lines.append(f"Showing rows {start_row+1} to {start_row+len(response.get('rows', []))} (sorted by {sort_by} {sort_direction})")
+        result_lines.append(f"Showing rows {start_row+1} to {start_row+len(rows)} (sorted by {sort_by} {sort_direction})")
         result_lines.append("\n" + "-" * 80 + "\n")
         
         # Create header based on dimensions
@@ -943,22 +2600,10 @@ async def get_advanced_search_analytics(
         result_lines.append("-" * 80)
         
         # Add data rows
-        for row in response.get("rows", []):
-            data = []
-            # Add dimension values
-            for dim_value in row.get("keys", []):
-                data.append(dim_value[:100])  # Increased truncation limit to 100 characters
-            
-            # Add metrics
-            data.append(str(row.get("clicks", 0)))
-            data.append(str(row.get("impressions", 0)))
-            data.append(f"{row.get('ctr', 0) * 100:.2f}%")
-            data.append(f"{row.get('position', 0):.1f}")
-            
-            result_lines.append(" | ".join(data))
+        result_lines.extend(_format_analytics_rows(rows))
         
         # Add pagination info if there might be more results
-        if len(response.get("rows", [])) == row_limit:
+        if len(rows) == row_limit:
             next_start = start_row + row_limit
             result_lines.append("\nThere may be more results available. To see the next page, use:")
             result_lines.append(f"start_row: {next_start}, row_limit: {row_limit}")
@@ -967,7 +2612,61 @@ async def get_advanced_search_analytics(
     except Exception as e:
         return f"Error retrieving advanced search analytics: {str(e)}"
 
+def _series_anomalies(matrix, window: int) -> Dict[str, Any]:
+    """
+    Scores every row of an (entities x days) matrix in vectorized blocks.
+
+    Spikes and drops: each day is compared with the mean of the `window` days before it, scaled by
+    their standard deviation (floored at the Poisson noise of the baseline). The day with the largest
+    absolute z-score is kept per series.
+
+    Level shifts: CUSUM of deviations from the series mean; the day where it peaks is the most likely
+    changepoint and max|S| / (sigma * sqrt(days)) its strength (above ~1.36 is significant at 5%).
+    """
+    import numpy as np
+
+    n, days = matrix.shape
+    result = {
+        "z": np.zeros(n), "peak_day": np.zeros(n, dtype=np.int64), "baseline": np.zeros(n),
+        "changepoint_day": np.zeros(n, dtype=np.int64), "shift_score": np.zeros(n),
+        "before": np.zeros(n), "after": np.zeros(n)
+    }
+    rows = np.arange(ANOMALY_CHUNK_ROWS)
+
+    for start in range(0, n, ANOMALY_CHUNK_ROWS):
+        block = matrix[start:start + ANOMALY_CHUNK_ROWS].astype(np.float64)
+        count = len(block)
+        out = slice(start, start + count)
+        sums = np.zeros((count, days + 1))
+        np.cumsum(block, axis=1, out=sums[:, 1:])
+        squares = np.zeros((count, days + 1))
+        np.cumsum(block * block, axis=1, out=squares[:, 1:])
+
+        # Trailing window statistics for days window..days-1
+        mean = (sums[:, window:days] - sums[:, :days - window]) / window
+        variance = (squares[:, window:days] - squares[:, :days - window]) / window - mean * mean
+        scale = np.sqrt(np.maximum(np.maximum(variance, mean), 1.0))
+        z = (block[:, window:] - mean) / scale
+        peak = np.abs(z).argmax(axis=1)
+        result["z"][out] = z[rows[:count], peak]
+        result["baseline"][out] = mean[rows[:count], peak]
+        result["peak_day"][out] = peak + window
+
+        # Single changepoint per series
+        overall = sums[:, days:] / days
+        cusum = sums[:, 1:days] - overall * np.arange(1, days)
+        split = np.abs(cusum).argmax(axis=1)
+        sigma = np.sqrt(np.maximum(np.maximum(block.var(axis=1), overall[:, 0]), 1.0))
+        before = sums[rows[:count], split + 1]
+        result["shift_score"][out] = np.abs(cusum[rows[:count], split]) / (sigma * np.sqrt(days))
+        result["changepoint_day"][out] = split + 1
+        result["before"][out] = before / (split + 1)
+        result["after"][out] = (sums[:, days] - before) / (days - split - 1)
+
+    return result
+
 @mcp.tool()
+@deduplicate_calls
 async def compare_search_periods(
     site_url: str,
     period1_start: str,
@@ -975,7 +2674,10 @@ async def compare_search_periods(
     period2_start: str,
     period2_end: str,
     dimensions: str = "query",
-    limit: int = 10
+    limit: int = 10,
+    row_limit: int = 1000,
+    deadline_seconds: float = None,
+    ctx: Context = None
 ) -> str:
     """
     Compare search analytics data between two time periods.
@@ -988,87 +2690,58 @@ async def compare_search_periods(
         period2_end: End date for period 2 (YYYY-MM-DD)
         dimensions: Dimensions to group by (default: query)
         limit: Number of top results to compare (default: 10)
+        row_limit: Number of rows to fetch per period before matching them up (default: 1000, max 250000)
+        deadline_seconds: Time budget in seconds; whatever was done when it runs out is returned (default: GSC_TOOL_DEADLINE_SECONDS, 120)
     """
     try:
         service = get_gsc_service()
         
         # Parse dimensions
         dimension_list = [d.strip() for d in dimensions.split(",")]
+        row_limit = max(1, min(row_limit, MAX_ANALYTICS_ROWS))
         
         # Build requests for both periods
         period1_request = {
             "startDate": period1_start,
             "endDate": period1_end,
-            "dimensions": dimension_list,
-            "rowLimit": 1000  # Get more to ensure we can match items between periods
+            "dimensions": dimension_list
         }
         
         period2_request = {
             "startDate": period2_start,
             "endDate": period2_end,
-            "dimensions": dimension_list,
-            "rowLimit": 1000
+            "dimensions": dimension_list
         }
         
-        # Execute requests
-        period1_response = service.searchanalytics().query(siteUrl=site_url, body=period1_request).execute()
-        period2_response = service.searchanalytics().query(siteUrl=site_url, body=period2_request).execute()
+        # Execute requests; both periods share one vocabulary so they can be joined on codes
+        progress = ToolProgress(ctx, unit="result pages fetched")
+        deadline = Deadline.for_tool("compare_search_periods", deadline_seconds)
+        period1 = await _query_analytics_rows(service, site_url, period1_request, max_rows=row_limit, progress=progress, deadline=deadline)
+        period2 = await _query_analytics_rows(service, site_url, period2_request, max_rows=row_limit, vocabulary=period1.vocabulary, progress=progress, deadline=deadline)
         
-        period1_rows = period1_response.get("rows", [])
-        period2_rows = period2_response.get("rows", [])
-        
-        if not period1_rows and not period2_rows:
+        if not period1 and not period2:
             return f"No data found for either period for {site_url}."
         
-        # Create dictionaries for easy lookup
-        period1_data = {tuple(row.get("keys", [])): row for row in period1_rows}
-        period2_data = {tuple(row.get("keys", [])): row for row in period2_rows}
+        # Match rows between periods (-1 where a key only appears in one period)
+        left, right = period1.outer_join(period2)
         
-        # Find common keys and calculate differences
-        all_keys = set(period1_data.keys()) | set(period2_data.keys())
-        comparison_data = []
+        def metric(rows, indices, k, name):
+            i = indices[k]
+            return getattr(rows, name)[i] if i >= 0 else 0.0
         
-        for key in all_keys:
-            p1_row = period1_data.get(key, {"clicks": 0, "impressions": 0, "ctr": 0, "position": 0})
-            p2_row = period2_data.get(key, {"clicks": 0, "impressions": 0, "ctr": 0, "position": 0})
-            
-            # Calculate differences
-            click_diff = p2_row.get("clicks", 0) - p1_row.get("clicks", 0)
-            click_pct = (click_diff / p1_row.get("clicks", 1)) * 100 if p1_row.get("clicks", 0) > 0 else float('inf')
-            
-            imp_diff = p2_row.get("impressions", 0) - p1_row.get("impressions", 0)
-            imp_pct = (imp_diff / p1_row.get("impressions", 1)) * 100 if p1_row.get("impressions", 0) > 0 else float('inf')
-            
-            ctr_diff = p2_row.get("ctr", 0) - p1_row.get("ctr", 0)
-            pos_diff = p1_row.get("position", 0) - p2_row.get("position", 0)  # Note: lower position is better
-            
-            comparison_data.append({
-                "key": key,
-                "p1_clicks": p1_row.get("clicks", 0),
-                "p2_clicks": p2_row.get("clicks", 0),
-                "click_diff": click_diff,
-                "click_pct": click_pct,
-                "p1_impressions": p1_row.get("impressions", 0),
-                "p2_impressions": p2_row.get("impressions", 0),
-                "imp_diff": imp_diff,
-                "imp_pct": imp_pct,
-                "p1_ctr": p1_row.get("ctr", 0),
-                "p2_ctr": p2_row.get("ctr", 0),
-                "ctr_diff": ctr_diff,
-                "p1_position": p1_row.get("position", 0),
-                "p2_position": p2_row.get("position", 0),
-                "pos_diff": pos_diff
-            })
+        click_diff = array("d", (metric(period2, right, k, "clicks") - metric(period1, left, k, "clicks") for k in range(len(left))))
         
         # Sort by absolute click difference (can change to other metrics)
-        comparison_data.sort(key=lambda x: abs(x["click_diff"]), reverse=True)
+        top = heapq.nlargest(limit, range(len(click_diff)), key=lambda k: abs(click_diff[k]))
         
         # Format results
         result_lines = [f"Search analytics comparison for {site_url}:"]
         result_lines.append(f"Period 1: {period1_start} to {period1_end}")
         result_lines.append(f"Period 2: {period2_start} to {period2_end}")
         result_lines.append(f"Dimension(s): {dimensions}")
-        result_lines.append(f"Top {min(limit, len(comparison_data))} results by change in clicks:")
+        if period1.truncated or period2.truncated:
+            result_lines.append(f"Note: Time budget of {deadline.seconds:g}s reached; comparing the {len(period1):,} + {len(period2):,} rows fetched by then.")
+        result_lines.append(f"Top {min(limit, len(click_diff))} results by change in clicks:")
         result_lines.append("\n" + "-" * 100 + "\n")
         
         # Create header
@@ -1077,27 +2750,351 @@ async def compare_search_periods(
         result_lines.append("-" * 100)
         
         # Add data rows (limited to requested number)
-        for item in comparison_data[:limit]:
-            key_str = " | ".join([str(k)[:100] for k in item["key"]])
+        for k in top:
+            key = period1.key(left[k]) if left[k] >= 0 else period2.key(right[k])
+            key_str = " | ".join([str(value)[:100] for value in key])
+            
+            p1_clicks = metric(period1, left, k, "clicks")
+            p2_clicks = metric(period2, right, k, "clicks")
+            p1_position = metric(period1, left, k, "position")
+            p2_position = metric(period2, right, k, "position")
             
-            # Format the click change with color indicators
-            click_change = item["click_diff"]
-            click_pct = item["click_pct"] if item["click_pct"] != float('inf') else "N/A"
-            click_pct_str = f"{click_pct:.1f}%" if click_pct != "N/A" else "N/A"
+            # Format the click change
+            click_change = click_diff[k]
+            click_pct_str = f"{click_change / p1_clicks * 100:.1f}%" if p1_clicks > 0 else "N/A"
             
             # Format position change (positive is good - moving up in rankings)
-            pos_change = item["pos_diff"]
+            pos_change = p1_position - p2_position
             
             result_lines.append(
-                f"{key_str} | {item['p1_clicks']} | {item['p2_clicks']} | "
-                f"{click_change:+d} | {click_pct_str} | "
-                f"{item['p1_position']:.1f} | {item['p2_position']:.1f} | {pos_change:+.1f}"
+                f"{key_str} | {p1_clicks:.0f} | {p2_clicks:.0f} | "
+                f"{click_change:+.0f} | {click_pct_str} | "
+                f"{p1_position:.1f} | {p2_position:.1f} | {pos_change:+.1f}"
             )
         
         return "\n".join(result_lines)
     except Exception as e:
         return f"Error comparing search periods: {str(e)}"
 
+@mcp.tool()
+@deduplicate_calls
+async def detect_anomalies(
+    site_url: str,
+    dimension: str = "page",
+    metric: str = "clicks",
+    days: int = 90,
+    window: int = 28,
+    limit: int = 20,
+    min_clicks: int = 10,
+    max_rows: int = MAX_ANALYTICS_ROWS,
+    deadline_seconds: float = None,
+    ctx: Context = None
+) -> str:
+    """
+    Find the pages or queries whose daily traffic behaves most unusually: sudden spikes or drops
+    against their recent baseline, and lasting level shifts (changepoints).
+    
+    Args:
+        site_url: The URL of the site in Search Console (must be exact match)
+        dimension: Entity to analyze, "page" or "query" (default: page)
+        metric: Daily series to score, "clicks" or "impressions" (default: clicks)
+        days: Number of days to analyze, ending before the still-incomplete last 3 days (default: 90, max 480)
+        window: Number of preceding days each day is compared against (default: 28)
+        limit: Number of entities to list per section (default: 20)
+        min_clicks: Ignore entities with fewer total clicks over the period (default: 10)
+        max_rows: Maximum number of entity-day rows to fetch (default: 250000, max 2000000)
+        deadline_seconds: Time budget in seconds; whatever was fetched when it runs out is analyzed (default: GSC_TOOL_DEADLINE_SECONDS, 120)
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return "Error: detect_anomalies needs NumPy. Install it with `pip install numpy` (or the `analysis` extra of mcp-gsc)."
+    
+    if dimension not in ("page", "query"):
+        return "Error: dimension must be 'page' or 'query'."
+    if metric not in ("clicks", "impressions"):
+        return "Error: metric must be 'clicks' or 'impressions'."
+    days = max(1, min(days, 480))
+    window = max(2, window)
+    max_rows = max(1, min(max_rows, MAX_BULK_ANALYTICS_ROWS))
+    if days < window + 7:
+        return f"Error: days must be at least window + 7 ({window + 7}) so there is something to compare against the baseline."
+    
+    try:
+        service = get_gsc_service()
+        
+        # Daily rows per entity
+        end_date = datetime.now().date() - timedelta(days=DATA_LAG_DAYS)
+        start_date = end_date - timedelta(days=days - 1)
+        request = {
+            "startDate": start_date.strftime("%Y-%m-%d"),
+            "endDate": end_date.strftime("%Y-%m-%d"),
+            "dimensions": ["date", dimension]
+        }
+        
+        progress = ToolProgress(ctx, unit="result pages fetched")
+        deadline = Deadline.for_tool("detect_anomalies", deadline_seconds)
+        rows = await _query_analytics_rows(
+            service, site_url, request, max_rows=max_rows, progress=progress, deadline=deadline
+        )
+        
+        if not rows:
+            return f"No data found for {site_url} between {request['startDate']} and {request['endDate']}."
+        
+        # Scatter the rows into an entities x days matrix, straight from the row store's arrays
+        date_codes = np.frombuffer(rows.codes[0], dtype=np.uint32)
+        entity_codes = np.frombuffer(rows.codes[1], dtype=np.uint32)
+        day_of_code = (np.array(rows.vocabulary.values[0], dtype="datetime64[D]") - np.datetime64(start_date)).astype(np.int64)
+        day_index = day_of_code[date_codes]
+        clicks = np.frombuffer(rows.clicks, dtype=np.float64)
+        values = clicks if metric == "clicks" else np.frombuffer(rows.impressions, dtype=np.float64)
+        
+        entity_count = len(rows.vocabulary.values[1])
+        kept = np.flatnonzero(np.bincount(entity_codes, weights=clicks, minlength=entity_count) >= min_clicks)
+        if not len(kept):
+            return f"No {dimension} has at least {min_clicks} clicks between {request['startDate']} and {request['endDate']}."
+        position = np.full(entity_count, -1, dtype=np.int64)
+        position[kept] = np.arange(len(kept))
+        selected = position[entity_codes] >= 0
+        matrix = np.zeros((len(kept), days), dtype=np.float32)
+        matrix[position[entity_codes[selected]], day_index[selected]] = values[selected]
+        
+        scores = await asyncio.to_thread(_series_anomalies, matrix, window)
+        
+        def day(offset):
+            return (start_date + timedelta(days=int(offset))).strftime("%Y-%m-%d")
+        
+        def name(k):
+            return rows.vocabulary.values[1][kept[k]][:100]
+        
+        # Format results
+        result_lines = [f"Traffic anomalies for {site_url} ({dimension}, daily {metric}):"]
+        result_lines.append(f"Period: {request['startDate']} to {request['endDate']}, baseline window {window} days")
+        result_lines.append(f"Entities analyzed: {len(kept):,} with at least {min_clicks} clicks")
+        if rows.truncated:
+            result_lines.append(f"Note: Time budget of {deadline.seconds:g}s reached; analyzing the {len(rows):,} rows fetched by then.")
+        elif len(rows) >= max_rows:
+            result_lines.append(f"Note: Row limit of {len(rows):,} reached; low-traffic days may be missing and look like drops.")
+        
+        result_lines.append("\nSpikes and drops (largest deviation from the trailing baseline):")
+        result_lines.append("-" * 100)
+        result_lines.append(f"{dimension.capitalize()} | Date | {metric.capitalize()} | Baseline | Z-score")
+        result_lines.append("-" * 100)
+        for k in np.argsort(-np.abs(scores["z"]))[:limit]:
+            peak = scores["peak_day"][k]
+            result_lines.append(
+                f"{name(k)} | {day(peak)} | {matrix[k, peak]:.0f} | {scores['baseline'][k]:.1f} | {scores['z'][k]:+.1f}"
+            )
+        
+        result_lines.append("\nLevel shifts (most likely changepoint, CUSUM):")
+        result_lines.append("-" * 100)
+        result_lines.append(f"{dimension.capitalize()} | Changepoint | Daily before | Daily after | Change | Strength")
+        result_lines.append("-" * 100)
+        for k in np.argsort(-scores["shift_score"])[:limit]:
+            before, after = scores["before"][k], scores["after"][k]
+            change_str = f"{(after - before) / before * 100:+.1f}%" if before > 0 else "N/A"
+            result_lines.append(
+                f"{name(k)} | {day(scores['changepoint_day'][k])} | {before:.1f} | {after:.1f} | "
+                f"{change_str} | {scores['shift_score'][k]:.2f}"
+            )
+        
+        return "\n".join(result_lines)
+    except Exception as e:
+        return f"Error detecting anomalies: {str(e)}"
+
+@mcp.tool()
+@deduplicate_calls
+async def find_keyword_cannibalization(
+    site_url: str,
+    days: int = 28,
+    limit: int = 20,
+    min_impressions: int = 100,
+    min_share: float = 0.1,
+    max_rows: int = MAX_ANALYTICS_ROWS,
+    deadline_seconds: float = None,
+    ctx: Context = None
+) -> str:
+    """
+    Find queries where several pages of the site compete for the same searches, ranked by the
+    clicks lost compared with sending all impressions to the best-performing page.
+    
+    Args:
+        site_url: The URL of the site in Search Console (must be exact match)
+        days: Number of days to look back (default: 28)
+        limit: Number of queries to list (default: 20)
+        min_impressions: Ignore queries with fewer total impressions (default: 100)
+        min_share: Share of a query's impressions a page needs to count as competing (default: 0.1)
+        max_rows: Maximum number of query x page rows to fetch (default: 250000, max 2000000)
+        deadline_seconds: Time budget in seconds; whatever was fetched when it runs out is analyzed (default: GSC_TOOL_DEADLINE_SECONDS, 120)
+    """
+    try:
+        service = get_gsc_service()
+        
+        # Calculate date range
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=days)
+        
+        request = {
+            "startDate": start_date.strftime("%Y-%m-%d"),
+            "endDate": end_date.strftime("%Y-%m-%d"),
+            "dimensions": ["query", "page"]
+        }
+        
+        max_rows = max(1, min(max_rows, MAX_BULK_ANALYTICS_ROWS))
+        progress = ToolProgress(ctx, unit="result pages fetched")
+        deadline = Deadline.for_tool("find_keyword_cannibalization", deadline_seconds)
+        rows = await _query_analytics_rows(service, site_url, request, max_rows=max_rows, progress=progress, deadline=deadline)
+        
+        if not rows:
+            return f"No search analytics data found for {site_url} in the last {days} days."
+        
+        # Group rows by query; within a group each row is one page
+        offsets, order = rows.group_by(0)
+        top = []  # Min-heap of (lost clicks, query code), never larger than limit
+        queries_checked = 0
+        queries_split = 0
+        total_lost = 0.0
+        for q in range(len(offsets) - 1):
+            group = order[offsets[q]:offsets[q + 1]]
+            if len(group) < 2:
+                continue
+            impressions = sum(rows.impressions[i] for i in group)
+            if impressions < min_impressions:
+                continue
+            queries_checked += 1
+            competing = [i for i in group if rows.impressions[i] >= min_share * impressions]
+            if len(competing) < 2:
+                continue
+            
+            # Clicks had every impression gone to the competing page with the best CTR
+            clicks = sum(rows.clicks[i] for i in group)
+            lost = max(0.0, max(rows.ctr[i] for i in competing) * impressions - clicks)
+            total_lost += lost
+            queries_split += 1
+            if len(top) < limit:
+                heapq.heappush(top, (lost, q))
+            elif lost > top[0][0]:
+                heapq.heapreplace(top, (lost, q))
+        
+        top.sort(reverse=True)
+        
+        # Format results
+        result_lines = [f"Keyword cannibalization for {site_url} (last {days} days):"]
+        result_lines.append(f"Query x page rows analyzed: {len(rows):,}")
+        if rows.truncated:
+            result_lines.append(f"Note: Time budget of {deadline.seconds:g}s reached; analyzing the rows fetched by then.")
+        elif len(rows) >= max_rows:
+            result_lines.append(f"Note: Row limit of {max_rows:,} reached; low-traffic query/page pairs are not included.")
+        result_lines.append(f"Queries with at least {min_impressions} impressions on 2+ pages: {queries_checked:,}")
+        result_lines.append(f"Queries split across competing pages: {queries_split:,} (estimated {total_lost:,.0f} clicks lost)")
+        
+        if not top:
+            return "\n".join(result_lines)
+        
+        result_lines.append(f"\nTop {len(top)} queries by lost clicks:")
+        result_lines.append("-" * 80)
+        for lost, q in top:
+            group = order[offsets[q]:offsets[q + 1]]
+            impressions = sum(rows.impressions[i] for i in group)
+            competing = [i for i in group if rows.impressions[i] >= min_share * impressions]
+            result_lines.append(f"Query: {rows.vocabulary.values[0][q][:100]} | Impressions: {impressions:.0f} | Lost clicks: {lost:.0f}")
+            for i in sorted(competing, key=rows.impressions.__getitem__, reverse=True):
+                result_lines.append(
+                    f"  {rows.key(i)[1][:100]} | Share: {rows.impressions[i] / impressions * 100:.1f}% | "
+                    f"Clicks: {rows.clicks[i]:.0f} | CTR: {rows.ctr[i] * 100:.2f}% | Position: {rows.position[i]:.1f}"
+                )
+            result_lines.append("-" * 80)
+        
+        return "\n".join(result_lines)
+    except Exception as e:
+        return f"Error finding keyword cannibalization: {str(e)}"
+
+@mcp.tool()
+@deduplicate_calls
+async def get_query_topics(
+    site_url: str,
+    days: int = 28,
+    limit: int = 20,
+    queries_per_topic: int = 5,
+    max_rows: int = MAX_ANALYTICS_ROWS,
+    deadline_seconds: float = None,
+    ctx: Context = None
+) -> str:
+    """
+    Group the site's search queries into topics of near-duplicate queries (sharing most of their
+    words) and report clicks, impressions, CTR and position per topic.
+    
+    Args:
+        site_url: The URL of the site in Search Console (must be exact match)
+        days: Number of days to look back (default: 28)
+        limit: Number of topics to list (default: 20)
+        queries_per_topic: Number of top queries shown for each topic (default: 5)
+        max_rows: Maximum number of queries to fetch (default: 250000, max 2000000)
+        deadline_seconds: Time budget in seconds; whatever was fetched when it runs out is grouped (default: GSC_TOOL_DEADLINE_SECONDS, 120)
+    """
+    try:
+        service = get_gsc_service()
+        
+        # Calculate date range
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=days)
+        
+        request = {
+            "startDate": start_date.strftime("%Y-%m-%d"),
+            "endDate": end_date.strftime("%Y-%m-%d"),
+            "dimensions": ["query"]
+        }
+        
+        max_rows = max(1, min(max_rows, MAX_BULK_ANALYTICS_ROWS))
+        progress = ToolProgress(ctx, unit="result pages fetched")
+        deadline = Deadline.for_tool("get_query_topics", deadline_seconds)
+        rows = await _query_analytics_rows(service, site_url, request, max_rows=max_rows, progress=progress, deadline=deadline)
+        
+        if not rows:
+            return f"No search analytics data found for {site_url} in the last {days} days."
+        
+        # Assign topics, most searched queries first so they name new topics
+        order = rows.top("impressions")
+        queries = [rows.key(i)[0] for i in order]
+        clusters = await asyncio.to_thread(get_query_cluster_store().assign, site_url, queries)
+        
+        # Aggregate metrics per topic
+        topics: Dict[str, Dict[str, Any]] = {}
+        for i, query in zip(order, queries):
+            topic = topics.setdefault(clusters[query], {"clicks": 0.0, "impressions": 0.0, "weighted_position": 0.0, "queries": []})
+            topic["clicks"] += rows.clicks[i]
+            topic["impressions"] += rows.impressions[i]
+            topic["weighted_position"] += rows.position[i] * rows.impressions[i]
+            topic["queries"].append(query)
+        
+        top = heapq.nlargest(limit, topics.items(), key=lambda item: (item[1]["clicks"], item[1]["impressions"]))
+        
+        # Format results
+        result_lines = [f"Query topics for {site_url} (last {days} days):"]
+        result_lines.append(f"{len(queries):,} queries grouped into {len(topics):,} topics")
+        if rows.truncated:
+            result_lines.append(f"Note: Time budget of {deadline.seconds:g}s reached; grouping the queries fetched by then.")
+        elif len(rows) >= max_rows:
+            result_lines.append(f"Note: Row limit of {max_rows:,} reached; the least searched queries are not included.")
+        result_lines.append("\n" + "-" * 80 + "\n")
+        result_lines.append("Topic | Queries | Clicks | Impressions | CTR | Position")
+        result_lines.append("-" * 80)
+        
+        for name, topic in top:
+            impressions = topic["impressions"]
+            ctr = topic["clicks"] / impressions * 100 if impressions else 0.0
+            position = topic["weighted_position"] / impressions if impressions else 0.0
+            result_lines.append(
+                f"{name[:100]} | {len(topic['queries'])} | {topic['clicks']:.0f} | {impressions:.0f} | {ctr:.2f}% | {position:.1f}"
+            )
+            others = [query for query in topic["queries"] if query != name][:queries_per_topic]
+            if others:
+                result_lines.append("  also: " + ", ".join(query[:60] for query in others))
+        
+        return "\n".join(result_lines)
+    except Exception as e:
+        return f"Error grouping queries into topics: {str(e)}"
+
 @mcp.tool()
 async def get_search_by_page_query(
     site_url: str,
@@ -1185,10 +3182,10 @@ async def list_sitemaps_enhanced(site_url: str, sitemap_index: str = None) -> st
         
         # Get sitemaps list
         if sitemap_index:
-            sitemaps = service.sitemaps().list(siteUrl=site_url, sitemapIndex=sitemap_index).execute()
+            sitemaps = await asyncio.to_thread(_cached_execute, "sitemaps", service.sitemaps().list(siteUrl=site_url, sitemapIndex=sitemap_index), site_url, sitemap_index)
             source = f"child sitemaps from index: {sitemap_index}"
         else:
-            sitemaps = service.sitemaps().list(siteUrl=site_url).execute()
+            sitemaps = await asyncio.to_thread(_cached_execute, "sitemaps", service.sitemaps().list(siteUrl=site_url), site_url)
             source = "all submitted sitemaps"
         
         if not sitemaps.get("sitemap"):
@@ -1331,6 +3328,7 @@ async def submit_sitemap(site_url: str, sitemap_url: str) -> str:
         
         # Submit the sitemap
         service.sitemaps().submit(siteUrl=site_url, feedpath=sitemap_url).execute()
+        get_response_cache().invalidate(f"sitemaps|{site_url}|")
         
         # Verify submission by getting details
         try:
@@ -1385,6 +3383,7 @@ async def delete_sitemap(site_url: str, sitemap_url: str) -> str:
         
         # Delete the sitemap
         service.sitemaps().delete(siteUrl=site_url, feedpath=sitemap_url).execute()
+        get_response_cache().invalidate(f"sitemaps|{site_url}|")
         
         return f"Successfully deleted sitemap: {sitemap_url}\n\nNote: This only removes the sitemap from Search Console. Any URLs already indexed will remain in Google's index."
     
@@ -1426,6 +3425,190 @@ async def manage_sitemaps(site_url: str, action: str, sitemap_url: str = None, s
     except Exception as e:
         return f"Error managing sitemaps: {str(e)}"
 
+@mcp.tool()
+async def get_server_stats() -> str:
+    """
+    Show how well this server reuses work: HTTP connection reuse across API calls and
+    response cache hits (the cache is shared with other server processes on this machine).
+    """
+    try:
+        pool = _http_pool.stats()
+        cache = get_response_cache().stats()
+        
+        reused = pool["requests"] - pool["connections_opened"]
+        lookups = cache["hits"] + cache["misses"]
+        
+        result_lines = ["Server statistics:"]
+        result_lines.append("-" * 80)
+        result_lines.append("HTTP connection pool:")
+        result_lines.append(f"  API requests: {pool['requests']:,}")
+        result_lines.append(f"  Connections opened: {pool['connections_opened']:,}")
+        if pool["requests"]:
+            result_lines.append(f"  Requests on a reused connection: {reused:,} ({reused / pool['requests'] * 100:.1f}%)")
+        result_lines.append(f"  Idle connections: {pool['idle']} (max {HTTP_POOL_SIZE}), in use: {pool['in_use']}, peak in use: {pool['peak_in_use']}")
+        result_lines.append("\nResponse cache:")
+        result_lines.append(f"  Lookups: {lookups:,}")
+        if lookups:
+            result_lines.append(f"  Hits: {cache['hits']:,} ({cache['hits'] / lookups * 100:.1f}%)")
+        result_lines.append(f"  Live entries (all processes): {cache['entries']:,}")
+        result_lines.append(f"  Location: {get_response_cache().path}")
+        
+        return "\n".join(result_lines)
+    except Exception as e:
+        return f"Error retrieving server statistics: {str(e)}"
+
+def _resource_site(site: str) -> str:
+    """
+    Site URLs appear percent-encoded in resource URIs, e.g. gsc://sites/sc-domain%3Aexample.com/analytics.
+    """
+    return urllib.parse.unquote(site)
+
+def _resource_uri(site_url: str, dataset: str) -> str:
+    return f"gsc://sites/{urllib.parse.quote(site_url, safe='')}/{dataset}"
+
+def _resource_etag(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def _resource_envelope(uri: str, data: Any, updated_at: Optional[str], etag: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Wraps a dataset with change metadata. The etag (by default a digest of the data) lets a client
+    compare it with the one it saw last (e.g. in the gsc://sites index) and skip unchanged data.
+    """
+    return {"uri": uri, "etag": etag or _resource_etag(data), "updated_at": updated_at, "data": data}
+
+def _cached_responses(kind: str, site_url: str) -> tuple:
+    """
+    Returns the live cached responses of one kind for a site as (entries, updated_at), where
+    each entry holds the request params and fetch time. Reads the cache only, never the API.
+    """
+    entries = []
+    for key, expires_at, value in get_response_cache().entries(f"{kind}|{site_url}|"):
+        fetched_at = datetime.fromtimestamp(expires_at - CACHE_TTL_SECONDS[kind], timezone.utc).isoformat()
+        entries.append({"request": json.loads(key.split("|", 2)[2]), "fetched_at": fetched_at, "response": value})
+    entries.sort(key=lambda entry: json.dumps(entry["request"], sort_keys=True))
+    return entries, max((entry["fetched_at"] for entry in entries), default=None)
+
+def _cached_responses_version(kind: str, site_url: str) -> tuple:
+    """
+    Returns (count, updated_at) of the live cached responses of one kind for a site, from the cache
+    index alone: updated_at matches the one _cached_responses derives from the same rows.
+    """
+    count, latest = get_response_cache().version(f"{kind}|{site_url}|")
+    updated_at = datetime.fromtimestamp(latest - CACHE_TTL_SECONDS[kind], timezone.utc).isoformat() if latest else None
+    return count, updated_at
+
+def _analytics_dataset(site_url: str) -> tuple:
+    entries, updated_at = _cached_responses("analytics", site_url)
+    data = [{"request": entry["request"], "fetched_at": entry["fetched_at"], "rows": entry["response"].get("rows", [])} for entry in entries]
+    return data, updated_at
+
+def _inspections_dataset(site_url: str) -> tuple:
+    records = get_inspection_ledger().records(site_url)
+    return records, max((record["inspected_at"] for record in records), default=None)
+
+def _sitemaps_dataset(site_url: str) -> tuple:
+    """
+    Assembles the cached sitemap listings into a tree: sitemap index entries get the listing
+    of their child sitemaps as "children" when it has been fetched.
+    """
+    entries, updated_at = _cached_responses("sitemaps", site_url)
+    listings = {entry["request"]: entry["response"].get("sitemap", []) for entry in entries}
+
+    def expand(sitemaps, seen):
+        tree = []
+        for sitemap in sitemaps:
+            node = dict(sitemap)
+            path = sitemap.get("path")
+            if sitemap.get("isSitemapsIndex") and path in listings and path not in seen:
+                node["children"] = expand(listings[path], seen | {path})
+            tree.append(node)
+        return tree
+
+    return expand(listings.get(None, []), frozenset()), updated_at
+
+RESOURCE_DATASETS = {
+    "analytics": _analytics_dataset,
+    "inspections": _inspections_dataset,
+    "sitemaps": _sitemaps_dataset
+}
+
+# (count, updated_at) of each dataset, read without loading it; the etags are derived from these
+RESOURCE_VERSIONS = {
+    "analytics": functools.partial(_cached_responses_version, "analytics"),
+    "inspections": lambda site_url: get_inspection_ledger().version(site_url),
+    "sitemaps": functools.partial(_cached_responses_version, "sitemaps")
+}
+
+def _dataset_version(site_url: str, dataset: str) -> tuple:
+    """
+    Returns (uri, etag, updated_at, items) of a site's dataset without loading it.
+    """
+    uri = _resource_uri(site_url, dataset)
+    count, updated_at = RESOURCE_VERSIONS[dataset](site_url)
+    return uri, _resource_etag([uri, count, updated_at]), updated_at, count
+
+def _sites_index() -> str:
+    site_urls = set(get_inspection_ledger().sites())
+    for kind in ("analytics", "sitemaps", "inspection"):
+        site_urls.update(key.split("|", 2)[1] for key in get_response_cache().keys(f"{kind}|"))
+    cached_sites, _ = _cached_responses("sites", "")
+    for entry in cached_sites:
+        site_urls.update(site.get("siteUrl") for site in entry["response"].get("siteEntry", []))
+    site_urls.discard("")
+
+    index = {}
+    for site_url in sorted(site_urls):
+        datasets = {}
+        for dataset in RESOURCE_DATASETS:
+            uri, etag, updated_at, items = _dataset_version(site_url, dataset)
+            datasets[dataset] = {"uri": uri, "etag": etag, "updated_at": updated_at, "items": items}
+        index[site_url] = datasets
+    return json.dumps(_resource_envelope("gsc://sites", index, None))
+
+def _dataset_resource(site_url: str, dataset: str) -> str:
+    # The version is read before the data: if a write lands in between, the etag is older than the
+    # data and the client re-reads once more, rather than missing the change
+    uri, etag, _, _ = _dataset_version(site_url, dataset)
+    return json.dumps(_resource_envelope(uri, *RESOURCE_DATASETS[dataset](site_url), etag))
+
+# Resource handlers read SQLite (and decode whole datasets) in a worker thread, off the event loop
+
+@mcp.resource(
+    "gsc://sites",
+    name="sites",
+    description="Index of the Search Console datasets held locally, with the URI, etag and number of stored items of each",
+    mime_type="application/json"
+)
+async def sites_resource() -> str:
+    return await asyncio.to_thread(_sites_index)
+
+@mcp.resource(
+    "gsc://sites/{site}/analytics",
+    name="analytics",
+    description="Cached Search Analytics responses for a site (site URL percent-encoded), with the request of each",
+    mime_type="application/json"
+)
+async def analytics_resource(site: str) -> str:
+    return await asyncio.to_thread(_dataset_resource, _resource_site(site), "analytics")
+
+@mcp.resource(
+    "gsc://sites/{site}/inspections",
+    name="inspections",
+    description="Inspection ledger of a site (site URL percent-encoded): last inspection, verdict and response per URL",
+    mime_type="application/json"
+)
+async def inspections_resource(site: str) -> str:
+    return await asyncio.to_thread(_dataset_resource, _resource_site(site), "inspections")
+
+@mcp.resource(
+    "gsc://sites/{site}/sitemaps",
+    name="sitemaps",
+    description="Cached sitemap tree of a site (site URL percent-encoded), sitemap indexes with their children",
+    mime_type="application/json"
+)
+async def sitemaps_resource(site: str) -> str:
+    return await asyncio.to_thread(_dataset_resource, _resource_site(site), "sitemaps")
+
 @mcp.tool()
 async def get_creator_info() -> str:
     """
@@ -1460,5 +3643,9 @@ Amin combines technical SEO knowledge with programming skills to create innovati
     return creator_info
 
 if __name__ == "__main__":
+    # Prefetch in the background; never trigger an interactive OAuth flow from there
+    if WARMUP_ENABLED and _has_stored_credentials():
+        threading.Thread(target=warm_up_cache, name="gsc-warm-up", daemon=True).start()
+    
     # Start the MCP server on stdio transport
     mcp.run(transport="stdio")